@@ -17,11 +17,16 @@
 This module defines constants used throughout the Finch MCP server.
 """
 
+import re
+import sys
+from types import MappingProxyType
+
+
 # Server name
 SERVER_NAME = 's3vectors_mcp_server'
 
 # Bucket name pattern
-VECTOR_BUCKET_NAME_PATTERN = r'[a-z0-9][a-z0-9-]{1,61}[a-z0-9]'
+VECTOR_BUCKET_NAME_PATTERN = r'^[a-z0-9][a-z0-9-]{1,61}[a-z0-9]$'
 """
 Regex pattern for validating S3 bucket names.
 Valid bucket names must:
@@ -44,18 +49,43 @@ VECTOR_INDEX_ARN_PATTERN = r'^arn:aws:s3vector:[a-z0-9-]+:\d{12}:bucket/[a-z0-9.
 # Vector Index Name Pattern
 VECTOR_INDEX_NAME_PATTERN = '^[a-z0-9](?:[a-z0-9.-]{1,61}[a-z0-9])?$'
 
+# Characters allowed by VECTOR_INDEX_NAME_PATTERN, for validation without regex
+VECTOR_INDEX_NAME_EDGE_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+VECTOR_INDEX_NAME_CHARS = VECTOR_INDEX_NAME_EDGE_CHARS + '.-'
+
 # AWS region pattern
 REGION_PATTERN = r'^[a-zA-Z0-9][a-zA-Z0-9-_]*$'
 
+# Keys and values of the encryption and metadata configurations, interned so that
+# dict lookups on them can short-circuit on identity
+SSE_TYPE_KEY = sys.intern('sseType')
+KMS_KEY_ARN_KEY = sys.intern('kmsKeyArn')
+SSE_TYPE_AES256 = sys.intern('AES256')
+SSE_TYPE_AWS_KMS = sys.intern('aws:kms')
+NON_FILTERABLE_METADATA_KEYS_KEY = sys.intern('nonFilterableMetadataKeys')
+EMBED_SRC_CONTENT_METADATA_KEY = sys.intern('S3VECTORS-EMBED-SRC-CONTENT')
+EMBED_SRC_LOCATION_METADATA_KEY = sys.intern('S3VECTORS-EMBED-SRC-LOCATION')
+
 # AWS S3 Vector Buckets Supported Server-Side Encryption Types
-VALID_S3_SSE_TYPES = ['AES256', 'aws:kms']
+VALID_S3_SSE_TYPES = [SSE_TYPE_AES256, SSE_TYPE_AWS_KMS]
+VALID_S3_SSE_TYPES_SET = frozenset(VALID_S3_SSE_TYPES)
+
+# AWS S3 Vector Bucket Default encryption configuration (read-only template, copy before use)
+AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION = MappingProxyType({SSE_TYPE_KEY: SSE_TYPE_AES256})
 
-# AWS S3 Vector Bucket Default encryption configuration
-AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION = {'sseType': 'AES256'}
+# AWS S3 Vector Index default non-filterable metadata keys, as written by s3vectors-embed-cli
+DEFAULT_NON_FILTERABLE_METADATA_KEYS = (
+    EMBED_SRC_CONTENT_METADATA_KEY,
+    EMBED_SRC_LOCATION_METADATA_KEY,
+)
 
 # AWS S3 Vector Bucket KMS ARN Regex Pattern
 
 VALID_S3_KMS_ARN = r'^arn:aws:kms:[a-z0-9-]+:\d{12}:key/[0-9a-fA-F-]{36}$'
+VALID_S3_KMS_ARN_RE = re.compile(VALID_S3_KMS_ARN)
+
+# AWS S3 Vector Index maximum vector dimension
+MAX_VECTOR_DIMENSION = 4096
 
 # AWS S3 Vector Index Supported Distance Metrics
 VALID_DISTANCE_METRICS = ['euclidean', 'cosine']
@@ -71,10 +101,21 @@ TEXT_EMBEDDING_MODELS = [
 
 IMAGE_EMBEDDING_MODELS = ['amazon.titan-embed-image-v1']
 
+# Set views of the model lists above, for membership checks
+TEXT_EMBEDDING_MODELS_SET = frozenset(TEXT_EMBEDDING_MODELS)
+IMAGE_EMBEDDING_MODELS_SET = frozenset(IMAGE_EMBEDDING_MODELS)
+
+# models whose text queries embed_and_query embeds itself instead of running s3vectors-embed
+DIRECT_QUERY_EMBEDDING_MODELS = TEXT_EMBEDDING_MODELS_SET | IMAGE_EMBEDDING_MODELS_SET
+
 # text and image file extensions
 TEXT_FILE_EXTENSIONS = {'.txt', '.pdf', '.doc', '.docx', '.md'}
 IMAGE_FILE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}
 
+# file extension -> embedding models that can embed files of that type
+EXT_TO_ALLOWED_MODELS = dict.fromkeys(TEXT_FILE_EXTENSIONS, TEXT_EMBEDDING_MODELS_SET)
+EXT_TO_ALLOWED_MODELS.update(dict.fromkeys(IMAGE_FILE_EXTENSIONS, IMAGE_EMBEDDING_MODELS_SET))
+
 # allowed modalities
 MODALITIES = ['text', 'image']
 
@@ -84,5 +125,60 @@ OUTPUT_FORMATS = ['json', 'table']
 # escape characters for removal
 ESCAPE_CHARS = r'[\x00-\x1f\x7f]'
 
+# botocore settings for the shared AWS clients, sized for concurrent tool calls (override the
+# connection pool size with S3VECTORS_AWS_MAX_POOL_CONNECTIONS)
+DEFAULT_AWS_CLIENT_MAX_POOL_CONNECTIONS = 64
+AWS_CLIENT_RETRIES = MappingProxyType({'mode': 'adaptive', 'max_attempts': 5})
+
+# default seconds that bucket and index metadata responses are cached for, and max cached
+# responses (override the TTL with S3VECTORS_METADATA_CACHE_TTL; 0 disables caching)
+DEFAULT_METADATA_CACHE_TTL = 60
+METADATA_CACHE_MAX_ENTRIES = 256
+
+# default seconds that embed_and_query results are cached for, and max cached queries
+# (override the TTL with S3VECTORS_QUERY_CACHE_TTL; 0 disables caching)
+DEFAULT_QUERY_CACHE_TTL = 60
+QUERY_CACHE_MAX_ENTRIES = 1024
+
+# default min cosine similarity at which a cached result is reused for a different query text
+# (override with S3VECTORS_QUERY_SEMANTIC_CACHE_THRESHOLD, e.g. 0.97; 0 disables semantic matching)
+DEFAULT_QUERY_SEMANTIC_CACHE_THRESHOLD = 0
+# max scopes (index, model, topK, filter, ...) the semantic cache keeps entries for at once;
+# each one holds up to QUERY_CACHE_MAX_ENTRIES embeddings
+QUERY_SEMANTIC_CACHE_MAX_SCOPES = 32
+
+# default max number of s3vectors-embed processes run concurrently
+# (override with S3VECTORS_EMBED_MAX_CONCURRENCY)
+DEFAULT_S3VECTORS_EMBED_MAX_CONCURRENCY = 8
+
+# default max number of PutVectors requests run concurrently
+# (override with S3VECTORS_PUT_VECTORS_MAX_CONCURRENCY)
+DEFAULT_PUT_VECTORS_MAX_CONCURRENCY = 8
+
+# default number of files s3vectors-embed put reads and embeds in parallel for wildcard inputs
+# (override with S3VECTORS_EMBED_MAX_WORKERS; the CLI's own default is 4)
+DEFAULT_S3VECTORS_EMBED_MAX_WORKERS = 16
+
+# default max number of create_vector_bucket and create_index calls run concurrently
+# (override with S3VECTORS_WRITE_MAX_CONCURRENCY)
+DEFAULT_S3VECTORS_WRITE_MAX_CONCURRENCY = 16
+
+# default max number of texts embedded and stored together by embed_and_store_text, and max
+# milliseconds a text waits for others to join its batch
+# (override with S3VECTORS_EMBED_BATCH_SIZE / S3VECTORS_EMBED_BATCH_MAX_WAIT_MS)
+DEFAULT_EMBED_BATCH_SIZE = 32
+DEFAULT_EMBED_BATCH_MAX_WAIT_MS = 15
+
+# max texts per Cohere embed request (Titan text models embed one text per request)
+COHERE_EMBED_MAX_TEXTS = 96
+
+# max vectors per S3 Vectors PutVectors request
+MAX_PUT_VECTORS_BATCH_SIZE = 500
+
+# default max milliseconds a vector waits for others to join its PutVectors request
+# (override with S3VECTORS_PUT_VECTORS_BATCH_MAX_WAIT_MS; S3VECTORS_PUT_VECTORS_BATCH_SIZE
+# lowers the batch size from MAX_PUT_VECTORS_BATCH_SIZE)
+DEFAULT_PUT_VECTORS_BATCH_MAX_WAIT_MS = 50
+
 # max bytes allowed in non-filterable metadata config
 MAX_LENGTH = 2048
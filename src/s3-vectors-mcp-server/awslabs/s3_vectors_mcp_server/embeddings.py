@@ -0,0 +1,284 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bedrock text embeddings and request batching for the S3 Vectors MCP server.
+
+The request bodies match the ones s3vectors-embed-cli sends for the same models, so vectors
+embedded here are interchangeable with vectors embedded by the CLI. They can optionally be
+scaled to unit length, which the CLI does not do; that leaves cosine distances unchanged, so it
+is only done for cosine indexes.
+"""
+
+import asyncio
+import hashlib
+import json
+import numpy as np
+import os
+import shelve
+import threading
+from awslabs.s3_vectors_mcp_server.consts import COHERE_EMBED_MAX_TEXTS
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+
+def supports_batch_embedding(model_id: str) -> bool:
+    """Whether the model embeds several texts in one InvokeModel request."""
+    return model_id.startswith('cohere.')
+
+
+def embed_texts(
+    bedrock_runtime, model_id: str, texts: List[str], dimension: int, input_type: str
+) -> np.ndarray:
+    """Embed texts with one Bedrock InvokeModel request.
+
+    Args:
+        bedrock_runtime: Bedrock Runtime client
+        model_id: Bedrock embedding model ID
+        texts: texts to embed; exactly one unless supports_batch_embedding(model_id)
+        dimension: dimension of the target vector index
+        input_type: Cohere input type ('search_document' or 'search_query')
+
+    Returns:
+        ndarray: float32 array with one row per text, in order
+    """
+    if supports_batch_embedding(model_id):
+        body: Dict[str, Any] = {'texts': texts, 'input_type': input_type}
+    else:
+        (text,) = texts
+        body = {'inputText': text}
+        if model_id == 'amazon.titan-embed-text-v2:0':
+            body['dimensions'] = dimension
+        elif model_id == 'amazon.titan-embed-image-v1':
+            body['embeddingConfig'] = {'outputEmbeddingLength': dimension}
+
+    response = bedrock_runtime.invoke_model(
+        modelId=model_id,
+        body=json.dumps(body),
+        contentType='application/json',
+        accept='application/json',
+    )
+    response_body = json.loads(response['body'].read())
+
+    if supports_batch_embedding(model_id):
+        return np.asarray(response_body['embeddings'], dtype=np.float32)
+    return np.asarray([response_body['embedding']], dtype=np.float32)
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """Scale each row of embeddings to unit length, in place.
+
+    Returns:
+        ndarray: embeddings
+    """
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    embeddings /= np.maximum(norms, np.finfo(np.float32).tiny)
+    return embeddings
+
+
+class EmbeddingCache:
+    """Persistent cache of text embeddings, shared across server restarts.
+
+    Entries are keyed by the SHA-256 of the model, dimension, input type and text, and stored
+    as little-endian float32 bytes in a shelve database.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the cache database at path."""
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = shelve.open(path)
+        # shelve does not support concurrent access
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_id: str, dimension: int, input_type: str, text: str) -> str:
+        """Content address of one embedding."""
+        return hashlib.sha256(
+            f'{model_id}\0{dimension}\0{input_type}\0{text}'.encode()
+        ).hexdigest()
+
+    def get_many(
+        self, model_id: str, dimension: int, input_type: str, texts: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Get the cached embeddings of texts, by text; texts that are not cached are left out."""
+        found = {}
+        with self._lock:
+            for text in texts:
+                value = self._db.get(self._key(model_id, dimension, input_type, text))
+                if value is not None:
+                    found[text] = np.frombuffer(value, dtype='<f4')
+        return found
+
+    def set_many(
+        self, model_id: str, dimension: int, input_type: str, embeddings: Dict[str, np.ndarray]
+    ) -> None:
+        """Cache embeddings, by text."""
+        with self._lock:
+            for text, embedding in embeddings.items():
+                key = self._key(model_id, dimension, input_type, text)
+                self._db[key] = np.asarray(embedding, dtype='<f4').tobytes()
+            self._db.sync()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._db.close()
+
+
+async def embed_text_batch(
+    bedrock_runtime,
+    model_id: str,
+    texts: List[str],
+    dimension: int,
+    input_type: str = 'search_document',
+    cache: Optional[EmbeddingCache] = None,
+    normalize: bool = False,
+) -> np.ndarray:
+    """Embed any number of texts with as few Bedrock requests as the model allows.
+
+    Each distinct text is embedded once, texts found in cache are not embedded again, and
+    requests run concurrently on worker threads. Embeddings stay float32 arrays, a seventh of
+    the memory of lists of Python floats; convert rows with tolist() where an API needs lists.
+
+    Returns:
+        ndarray: float32 array with one row per text, in order, scaled to unit length if
+            normalize is set
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    embeddings_by_text: Dict[str, np.ndarray] = {}
+    if cache is not None:
+        embeddings_by_text = await asyncio.to_thread(
+            cache.get_many, model_id, dimension, input_type, unique_texts
+        )
+        unique_texts = [text for text in unique_texts if text not in embeddings_by_text]
+
+    if supports_batch_embedding(model_id):
+        chunks = [
+            unique_texts[i : i + COHERE_EMBED_MAX_TEXTS]
+            for i in range(0, len(unique_texts), COHERE_EMBED_MAX_TEXTS)
+        ]
+    else:
+        chunks = [[text] for text in unique_texts]
+
+    results = await asyncio.gather(
+        *(
+            asyncio.to_thread(embed_texts, bedrock_runtime, model_id, chunk, dimension, input_type)
+            for chunk in chunks
+        )
+    )
+    new_embeddings = dict(zip(unique_texts, (row for result in results for row in result)))
+    if cache is not None and new_embeddings:
+        await asyncio.to_thread(cache.set_many, model_id, dimension, input_type, new_embeddings)
+
+    embeddings_by_text.update(new_embeddings)
+    if not texts:
+        return np.empty((0, dimension), dtype=np.float32)
+    embeddings = np.stack([embeddings_by_text[text] for text in texts])
+    return normalize_embeddings(embeddings) if normalize else embeddings
+
+
+def _is_item_error(error: Exception) -> bool:
+    """Whether error was caused by some of the items of a request rather than by the request.
+
+    That is a ValueError raised while building the request, or a ValidationException from AWS.
+    Retrying the items one by one only pays off for these; other errors would just repeat.
+    """
+    # Imported here so that importing embeddings does not pull in botocore
+    from botocore.exceptions import ClientError
+
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') == 'ValidationException'
+    return isinstance(error, ValueError)
+
+
+class MicroBatcher:
+    """Coalesce concurrent submissions with the same key into batches.
+
+    A batch is processed when it reaches max_batch_size items or max_wait seconds after its
+    first item arrived, whichever comes first. process_batch(key, items) must return one result
+    per item, in order; a result that is an exception is raised to the submission of that item
+    only. If process_batch raises an error caused by some of the items (see _is_item_error),
+    each item of the batch is processed again on its own, so that one bad item does not fail the
+    others; process_batch must be safe to repeat for the items of a batch that raised. Any other
+    error (throttling, credentials, network) fails every submission of the batch without
+    retrying it. If processing is cancelled, the pending submissions are cancelled too.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait: float,
+    ):
+        """Create a batcher that hands batches to process_batch."""
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        # Strong references to running batches, so they are not garbage collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """Add item to the pending batch for key and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        """Start processing the pending batch for key."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._process(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Process a batch and resolve the futures of its submissions."""
+        try:
+            await self._resolve(key, batch)
+        finally:
+            # Only left pending if processing was cancelled or interrupted
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def _resolve(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Process a batch, retrying its items one by one if some of them made it fail."""
+        try:
+            results = await self.process_batch(key, [item for item, _ in batch])
+        except Exception as e:
+            if len(batch) > 1 and _is_item_error(e):
+                await asyncio.gather(*(self._resolve(key, [entry]) for entry in batch))
+                return
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -14,95 +14,606 @@
 
 """Helper functions for the S3 Vectors MCP server."""
 
-import boto3
+import ast
+import asyncio
+import base64
+import contextlib
+import functools
+import io
+import json
+import numpy as np
 import os
-from awslabs.s3_vectors_mcp_server.models import EmbedAndQueryTextRequest
+import sys
+import threading
+import time
+import weakref
+from awslabs.s3_vectors_mcp_server.consts import (
+    AWS_CLIENT_RETRIES,
+    DEFAULT_AWS_CLIENT_MAX_POOL_CONNECTIONS,
+    DEFAULT_EMBED_BATCH_MAX_WAIT_MS,
+    DEFAULT_EMBED_BATCH_SIZE,
+    DEFAULT_METADATA_CACHE_TTL,
+    DEFAULT_PUT_VECTORS_BATCH_MAX_WAIT_MS,
+    DEFAULT_QUERY_CACHE_TTL,
+    DEFAULT_QUERY_SEMANTIC_CACHE_THRESHOLD,
+    DEFAULT_S3VECTORS_EMBED_MAX_CONCURRENCY,
+    DEFAULT_S3VECTORS_EMBED_MAX_WORKERS,
+    MAX_PUT_VECTORS_BATCH_SIZE,
+)
 from loguru import logger
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 
-# Configure Loguru logging
-# logger.remove()
-# logger.add(sys.stderr, level=os.getenv('FASTMCP_LOG_LEVEL', 'WARNING'))
+if TYPE_CHECKING:
+    from awslabs.s3_vectors_mcp_server.models import EmbedAndQueryTextRequest
 
-# Global client cache
-_s3_vectors_client = None
-_s3_vectors_global_config = []
-_s3_vectors_query_optional_config = []
+
+# Guards first-time client construction so concurrent callers share one session
+_aws_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=32)
+def _create_aws_client(
+    service_name: str, aws_region: str, aws_profile: Optional[str], max_pool_connections: int
+):
+    """Create a client for an AWS service in the given region and profile.
+
+    Results are cached per (service, region, profile, pool size), so each session is built only
+    once. The client keeps a connection pool large enough for concurrent tool calls, with TCP
+    keep-alive and adaptive retries.
+    """
+    # Imported here so that importing helpers does not pull in boto3/botocore
+    import boto3
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        retries=dict(AWS_CLIENT_RETRIES),
+        tcp_keepalive=True,
+    )
+
+    try:
+        if aws_profile:
+            return boto3.Session(profile_name=aws_profile, region_name=aws_region).client(
+                service_name, config=config
+            )
+        return boto3.Session(region_name=aws_region).client(service_name, config=config)
+    except Exception as e:
+        logger.error(f'Error creating {service_name} client: {str(e)}')
+        raise
+
+
+def _get_aws_client(service_name: str):
+    """Get the cached client for an AWS service, using AWS_REGION and AWS_PROFILE.
+
+    S3VECTORS_AWS_MAX_POOL_CONNECTIONS overrides the size of the client's connection pool.
+    """
+    # Read environment variables dynamically
+    aws_region = os.environ.get('AWS_REGION', 'us-east-1')
+    aws_profile = os.environ.get('AWS_PROFILE')
+    max_pool_connections = max(
+        1,
+        int(
+            os.environ.get(
+                'S3VECTORS_AWS_MAX_POOL_CONNECTIONS', DEFAULT_AWS_CLIENT_MAX_POOL_CONNECTIONS
+            )
+        ),
+    )
+
+    with _aws_client_lock:
+        return _create_aws_client(service_name, aws_region, aws_profile, max_pool_connections)
 
 
 def get_s3_vectors_client():
     """Get S3 Vectors client with proper session management and caching.
 
     Returns:
-        boto3.client: Configured S3 Vectors client (cached after first call)
+        boto3.client: Configured S3 Vectors client (cached per region and profile)
+    """
+    return _get_aws_client('s3vectors')
+
+
+def get_bedrock_runtime_client():
+    """Get Bedrock Runtime client with proper session management and caching.
+
+    Returns:
+        boto3.client: Configured Bedrock Runtime client (cached per region and profile)
+    """
+    return _get_aws_client('bedrock-runtime')
+
+
+# Sentinel for cache misses, so that None can be cached
+_MISSING = object()
+
+
+class LoopSemaphore:
+    """Semaphore that can be defined at import time and used from any event loop.
+
+    An asyncio.Semaphore binds to the loop that first waits on it, so each running loop gets
+    its own semaphore with the same value, created on first use.
+    """
+
+    def __init__(self, value: int):
+        """Create a semaphore that at most value holders hold at the same time, per event loop."""
+        self.value = value
+        # Semaphores by event loop, dropped together with their loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.value)
+        return semaphore
+
+    async def __aenter__(self) -> None:
+        """Acquire the semaphore of the running event loop."""
+        await self._semaphore().acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Release the semaphore of the running event loop."""
+        self._semaphore().release()
+
+
+class TTLCache:
+    """A cache whose entries expire a fixed number of seconds after they are stored.
+
+    A TTL of 0 (or less) disables the cache: nothing is stored and every lookup misses. When
+    maxsize is set, the least recently used entry is evicted once the cache is full.
+    """
+
+    def __init__(self, ttl: float, maxsize: Optional[int] = None):
+        """Create an empty cache whose entries live for ttl seconds."""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value cached under key, or default."""
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+
+        # Re-insert to mark the entry as most recently used
+        self._entries[key] = entry
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache value under key for ttl seconds."""
+        if self.ttl <= 0:
+            return
+
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            del self._entries[next(iter(self._entries))]
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the live value cached under key, or store and return factory()."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        self._entries.clear()
+
+
+def get_embedding_cache_path() -> Optional[str]:
+    """Get the path of the persistent text embedding cache.
+
+    Returns:
+        str: S3VECTORS_EMBED_CACHE_PATH, or None (no persistent cache) when it is not set
+    """
+    return os.environ.get('S3VECTORS_EMBED_CACHE_PATH') or None
+
+
+def get_local_index_dir() -> Optional[str]:
+    """Get the directory that local copies of vector indexes are persisted in.
+
+    Returns:
+        str: S3VECTORS_LOCAL_INDEX_DIR (e.g. ~/.cache/s3v), expanded, or None (local copies
+            are kept in memory only) when it is not set
+    """
+    local_index_dir = os.environ.get('S3VECTORS_LOCAL_INDEX_DIR')
+    return os.path.expanduser(local_index_dir) if local_index_dir else None
+
+
+def get_metadata_cache_ttl() -> float:
+    """Get the TTL in seconds for cached bucket and index metadata responses.
+
+    Returns:
+        float: S3VECTORS_METADATA_CACHE_TTL, or DEFAULT_METADATA_CACHE_TTL when it is not set
+    """
+    return float(os.environ.get('S3VECTORS_METADATA_CACHE_TTL', DEFAULT_METADATA_CACHE_TTL))
+
+
+def _get_batch_settings(
+    env_prefix: str, default_batch_size: int, default_max_wait_ms: float
+) -> Tuple[int, float]:
+    """Read <env_prefix>_BATCH_SIZE and <env_prefix>_BATCH_MAX_WAIT_MS from the environment.
+
+    Returns:
+        tuple: batch size (between 1 and MAX_PUT_VECTORS_BATCH_SIZE) and max wait in seconds
+    """
+    batch_size = int(os.environ.get(f'{env_prefix}_BATCH_SIZE', default_batch_size))
+    max_wait_ms = float(os.environ.get(f'{env_prefix}_BATCH_MAX_WAIT_MS', default_max_wait_ms))
+    return min(max(batch_size, 1), MAX_PUT_VECTORS_BATCH_SIZE), max_wait_ms / 1000
+
+
+def get_embed_batch_settings() -> Tuple[int, float]:
+    """Get the batch size and max wait (in seconds) for batched text embedding.
+
+    Returns:
+        tuple: S3VECTORS_EMBED_BATCH_SIZE (at most MAX_PUT_VECTORS_BATCH_SIZE) and
+            S3VECTORS_EMBED_BATCH_MAX_WAIT_MS converted to seconds, or their defaults
+    """
+    return _get_batch_settings(
+        'S3VECTORS_EMBED', DEFAULT_EMBED_BATCH_SIZE, DEFAULT_EMBED_BATCH_MAX_WAIT_MS
+    )
+
+
+def get_put_vectors_batch_settings() -> Tuple[int, float]:
+    """Get the batch size and max wait (in seconds) for buffered PutVectors writes.
+
+    Returns:
+        tuple: S3VECTORS_PUT_VECTORS_BATCH_SIZE (at most MAX_PUT_VECTORS_BATCH_SIZE) and
+            S3VECTORS_PUT_VECTORS_BATCH_MAX_WAIT_MS converted to seconds, or their defaults
+    """
+    return _get_batch_settings(
+        'S3VECTORS_PUT_VECTORS', MAX_PUT_VECTORS_BATCH_SIZE, DEFAULT_PUT_VECTORS_BATCH_MAX_WAIT_MS
+    )
+
+
+def get_query_cache_settings() -> Tuple[float, float]:
+    """Get the TTL in seconds and the semantic match threshold for cached query results.
+
+    Returns:
+        tuple: S3VECTORS_QUERY_CACHE_TTL and S3VECTORS_QUERY_SEMANTIC_CACHE_THRESHOLD, or their
+            defaults; a threshold of 0 disables semantic matching
     """
-    global _s3_vectors_client
+    ttl = float(os.environ.get('S3VECTORS_QUERY_CACHE_TTL', DEFAULT_QUERY_CACHE_TTL))
+    threshold = float(
+        os.environ.get(
+            'S3VECTORS_QUERY_SEMANTIC_CACHE_THRESHOLD', DEFAULT_QUERY_SEMANTIC_CACHE_THRESHOLD
+        )
+    )
+    return ttl, threshold
 
-    if _s3_vectors_client is None:
+
+# Bounds the number of s3vectors-embed processes running at once
+_s3vectors_cli_semaphore = LoopSemaphore(
+    int(os.environ.get('S3VECTORS_EMBED_MAX_CONCURRENCY', DEFAULT_S3VECTORS_EMBED_MAX_CONCURRENCY))
+)
+
+
+async def run_s3vectors_cli(command: Sequence[str]) -> bytes:
+    """Run an s3vectors-embed command without blocking the event loop.
+
+    At most S3VECTORS_EMBED_MAX_CONCURRENCY commands run at the same time; further calls wait
+    for a slot.
+
+    Returns:
+        bytes: stdout of the command
+
+    Raises:
+        RuntimeError: if the command exits with a non-zero code
+    """
+    async with _s3vectors_cli_semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        raise RuntimeError(
+            f'{command[0]} exited with code {process.returncode}: '
+            f'{stderr.decode(errors="replace").strip()}'
+        )
+
+    return stdout
+
+
+@functools.lru_cache(maxsize=None)
+def _get_s3vectors_embed_command(subcommand: str):
+    """Get the click command implementing ``s3vectors-embed <subcommand>``.
+
+    Returns:
+        click.Command, or None if s3vectors-embed-cli is not importable (e.g. it is installed
+        in a separate environment and only its executable is on PATH)
+    """
+    try:
+        from s3vectors.commands.embed_put import embed_put
+        from s3vectors.commands.embed_query import embed_query
+    except ImportError:
+        return None
+
+    return {'put': embed_put, 'query': embed_query}.get(subcommand)
+
+
+# Per-thread boto3 sessions for in-process s3vectors-embed commands (sessions are not thread-safe)
+_s3vectors_embed_sessions = threading.local()
+
+
+def _get_s3vectors_embed_session(aws_profile: Optional[str], aws_region: Optional[str]):
+    """Get this thread's boto3 session for the given profile and region, creating it once."""
+    import boto3
+
+    sessions: Dict = _s3vectors_embed_sessions.__dict__.setdefault('sessions', {})
+    session = sessions.get((aws_profile, aws_region))
+    if session is None:
+        session = sessions[(aws_profile, aws_region)] = boto3.Session(
+            profile_name=aws_profile, region_name=aws_region
+        )
+    return session
+
+
+class _ThreadCapturedStdout(io.TextIOBase):
+    """Stand-in for sys.stdout that captures writes per thread.
+
+    Some s3vectors-embed code paths print with print() or a Console() of their own instead of
+    the console passed in ctx.obj. Writes from a thread that is capturing go to its buffer;
+    writes from any other thread go to stderr, so that only MCP messages reach stdout (the stdio
+    transport writes to the original stdout's buffer, not through sys.stdout).
+    """
+
+    def __init__(self, stdout):
+        """Wrap the original stdout."""
+        self._stdout = stdout
+        self._local = threading.local()
+
+    @property
+    def buffer(self):
+        """Binary buffer of the original stdout."""
+        return self._stdout.buffer
+
+    def capture(self, output: Optional[io.StringIO]) -> None:
+        """Send this thread's writes to output, or stop capturing them when output is None."""
+        self._local.output = output
+
+    def write(self, s: str) -> int:
+        """Write to this thread's capture buffer, or to stderr."""
+        output = getattr(self._local, 'output', None)
+        return (output or sys.stderr).write(s)
+
+
+# Guards installing and restoring _ThreadCapturedStdout, which is sys.stdout only while at least
+# one thread is capturing
+_captured_stdout_lock = threading.Lock()
+_captured_stdout: Optional[_ThreadCapturedStdout] = None
+_capturing_threads = 0
+
+
+@contextlib.contextmanager
+def _capture_stdout(output: io.StringIO):
+    """Send this thread's writes to sys.stdout to output while the context is active.
+
+    sys.stdout is replaced by a _ThreadCapturedStdout when the first thread starts capturing and
+    restored when the last one stops.
+    """
+    global _captured_stdout, _capturing_threads
+
+    with _captured_stdout_lock:
+        if _capturing_threads == 0:
+            _captured_stdout = _ThreadCapturedStdout(sys.stdout)
+            sys.stdout = _captured_stdout
+        _capturing_threads += 1
+        stdout = _captured_stdout
+
+    stdout.capture(output)
+    try:
+        yield
+    finally:
+        stdout.capture(None)
+        with _captured_stdout_lock:
+            _capturing_threads -= 1
+            if _capturing_threads == 0:
+                if sys.stdout is stdout:
+                    sys.stdout = stdout._stdout
+                _captured_stdout = None
+
+
+def _run_s3vectors_embed_in_process(command, global_config: Sequence[str], args: Sequence[str]):
+    """Run an s3vectors-embed click command in this process and capture what it prints.
+
+    The global options are the ones built by get_s3vectors_cli_global_config, with --debug first.
+
+    Raises:
+        RuntimeError: if the command fails, with the output it printed before failing
+    """
+    from rich.console import Console
+
+    debug = '--debug' in global_config
+    options = dict(zip(global_config[debug::2], global_config[debug + 1 :: 2]))
+
+    # The CLI prints its results to this console; never let it write to the MCP stdio stream
+    output = io.StringIO()
+    obj = {
+        'aws_session': _get_s3vectors_embed_session(
+            options.get('--profile'), options.get('--region')
+        ),
+        'console': Console(file=output),
+        'debug': debug,
+    }
+
+    with _capture_stdout(output):
         try:
-            # Read environment variables dynamically
-            aws_region = os.environ.get('AWS_REGION', 'us-east-1')
-            aws_profile = os.environ.get('AWS_PROFILE')
+            command.main(args, prog_name='s3vectors-embed', obj=obj, standalone_mode=False)
+        except (Exception, SystemExit) as e:
+            # Commands may call sys.exit; exiting with code 0 (or None) is a success
+            if not isinstance(e, SystemExit) or e.code:
+                raise RuntimeError(
+                    f's3vectors-embed failed: {e}\n{output.getvalue()}'.rstrip()
+                ) from e
 
-            if aws_profile:
-                _s3_vectors_client = boto3.Session(
-                    profile_name=aws_profile, region_name=aws_region
-                ).client('s3vectors')
-            else:
-                _s3_vectors_client = boto3.Session(region_name=aws_region).client('s3vectors')
-        except Exception as e:
-            logger.error(f'Error creating S3 Vectors client: {str(e)}')
-            raise
+    return output.getvalue().encode()
 
-    return _s3_vectors_client
 
+async def run_s3vectors_embed(command_prefix: Tuple[str, ...], args: Sequence[str]) -> bytes:
+    """Run an s3vectors-embed command.
 
-def get_s3vectors_cli_global_config():
-    """Get s3-vectors-embed-cli global config based on environment variables.
+    Args:
+        command_prefix: ``('s3vectors-embed', *global_config, subcommand)``, built once by the
+            caller
+        args: arguments of the subcommand
+
+    When s3vectors-embed-cli is importable, the command runs in-process on a worker thread,
+    which avoids starting an interpreter and resolving credentials on every call; otherwise the
+    executable is run with run_s3vectors_cli. Both paths share the same concurrency limit.
 
     Returns:
-        list: containing elements pertaining to global options for s3vectors-embed-cli
+        bytes: the output the command printed
+
+    Raises:
+        RuntimeError: if the command fails
     """
-    global _s3_vectors_global_config
+    command = _get_s3vectors_embed_command(command_prefix[-1])
+    if command is None:
+        return await run_s3vectors_cli((*command_prefix, *args))
 
+    async with _s3vectors_cli_semaphore:
+        return await asyncio.to_thread(
+            _run_s3vectors_embed_in_process, command, command_prefix[1:-1], args
+        )
+
+
+def parse_s3vectors_cli_output(stdout: bytes) -> Any:
+    """Parse the stdout of an s3vectors-embed command into Python objects.
+
+    The output is parsed as JSON first (directly from bytes); if that fails it is parsed as a
+    Python literal, which covers dict reprs. Unlike eval, neither path executes the output.
+
+    Raises:
+        ValueError, SyntaxError: if stdout is neither JSON nor a Python literal.
+    """
+    try:
+        return json.loads(stdout)
+    except ValueError:
+        return ast.literal_eval(stdout.decode())
+
+
+def parse_s3vectors_cli_batch_output(stdout: bytes) -> Any:
+    """Parse the stdout of an s3vectors-embed put command that may have processed many files.
+
+    Wildcard inputs print progress lines around the JSON summary, and may print one JSON
+    document per line. Every JSON object or array that starts a line is parsed; a single
+    document is returned as is and several are returned as a list. Output without any JSON
+    is returned as text.
+    """
+    try:
+        return parse_s3vectors_cli_output(stdout)
+    except (ValueError, SyntaxError):
+        pass
+
+    text = stdout.decode('utf-8', errors='replace')
+    decoder = json.JSONDecoder()
+    documents = []
+    position = 0
+    while position < len(text):
+        line_end = text.find('\n', position)
+        if line_end == -1:
+            line_end = len(text)
+        if text[position : position + 1] in ('{', '['):
+            try:
+                document, position = decoder.raw_decode(text, position)
+                documents.append(document)
+                continue
+            except ValueError:
+                pass
+        position = line_end + 1
+
+    if not documents:
+        return text
+    return documents[0] if len(documents) == 1 else documents
+
+
+def encode_vectors_data_base64(vectors: List[Dict[str, Any]]) -> None:
+    """Replace the float32 data of S3 Vectors response vectors with its base64 encoding, in place.
+
+    Each {'float32': [...]} becomes {'float32_base64': '...'}, the base64 of the values as
+    little-endian float32, which numpy.frombuffer(..., dtype='<f4') decodes.
+    """
+    for vector in vectors:
+        data = vector.get('data')
+        if data and 'float32' in data:
+            values = np.asarray(data['float32'], dtype='<f4')
+            vector['data'] = {'float32_base64': base64.b64encode(values.tobytes()).decode()}
+
+
+def get_s3vectors_cli_global_config() -> Tuple[str, ...]:
+    """Get s3-vectors-embed-cli global config based on environment variables.
+
+    Returns:
+        tuple: containing elements pertaining to global options for s3vectors-embed-cli
+    """
     aws_region = os.environ.get('AWS_REGION', 'us-east-1')
     aws_profile = os.environ.get('AWS_PROFILE')
     debug_flag = os.environ.get('DEBUG_FLAG', 0)
 
+    global_config = []
+
     if debug_flag != 0:
-        _s3_vectors_global_config += ['--debug']
+        global_config.append('--debug')
 
     if aws_profile:
-        _s3_vectors_global_config += ['--profile', aws_profile]
+        global_config.extend(('--profile', aws_profile))
 
     if aws_region:
-        _s3_vectors_global_config += ['--region', aws_region]
+        global_config.extend(('--region', aws_region))
+
+    # Built once at server start and prefixed to every command
+    return tuple(sys.intern(option) for option in global_config)
 
-    return _s3_vectors_global_config
+
+def get_s3vectors_put_optional_config() -> Tuple[str, ...]:
+    """Get optional configuration for ```s3vectors-embed put``` based on environment variables.
+
+    Returns:
+        tuple: the --max-workers option, so wildcard inputs are fetched and embedded in parallel
+    """
+    max_workers = os.environ.get(
+        'S3VECTORS_EMBED_MAX_WORKERS', DEFAULT_S3VECTORS_EMBED_MAX_WORKERS
+    )
+    return ('--max-workers', str(max(1, int(max_workers))))
 
 
-def get_s3vectors_query_optional_config(embed_and_query_text_request: EmbedAndQueryTextRequest):
+def get_s3vectors_query_optional_config(
+    embed_and_query_text_request: 'EmbedAndQueryTextRequest',
+):
     """Get optional configuration for ```s3vectors-embed query``` based on incoming request.
 
     Returns:
         list: containing argument name and value for optional args to be used in embed_and_query_text_request.
 
     """
-    global _s3_vectors_query_optional_config
+    query_optional_config = []
 
     if embed_and_query_text_request.topK:
-        _s3_vectors_query_optional_config += ['--k', embed_and_query_text_request.topK]
+        query_optional_config.extend(('--k', embed_and_query_text_request.topK))
 
     if embed_and_query_text_request.filter:
-        _s3_vectors_query_optional_config += ['--filter', embed_and_query_text_request.filter]
+        query_optional_config.extend(('--filter', json.dumps(embed_and_query_text_request.filter)))
 
     if embed_and_query_text_request.returnMetadata:
-        _s3_vectors_query_optional_config += ['--return-metadata']
+        query_optional_config.append('--return-metadata')
 
     if embed_and_query_text_request.returnDistance:
-        _s3_vectors_query_optional_config += ['--return-distance']
+        query_optional_config.append('--return-distance')
 
     if embed_and_query_text_request.output:
-        _s3_vectors_query_optional_config += ['--output', embed_and_query_text_request.output]
+        query_optional_config.extend(('--output', embed_and_query_text_request.output))
 
-    return _s3_vectors_query_optional_config
+    return query_optional_config
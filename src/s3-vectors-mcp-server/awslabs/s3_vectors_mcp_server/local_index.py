@@ -0,0 +1,226 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local copies of S3 vector indexes for the S3 Vectors MCP server."""
+
+import json
+import mmap
+import numpy as np
+import os
+import uuid
+from loguru import logger
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class LocalIndex:
+    """In-memory snapshot of a vector index, searched exactly (by brute force) with numpy.
+
+    Vectors are kept in a contiguous float32 matrix with one row per vector. For the cosine
+    metric the rows are normalized when the index is built, so scoring a query is a single
+    matrix-vector product; for the euclidean metric the squared row norms are kept alongside.
+    A loaded index memory-maps its saved matrix instead of reading it into memory.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        vectors: np.ndarray,
+        metadata: List[Any],
+        distance_metric: str = 'cosine',
+    ):
+        """Create an index from its keys, float32 vectors (one row per key) and metadata.
+
+        For the cosine metric, the rows of vectors must already have unit length.
+        """
+        self.keys = keys
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.metadata = metadata
+        self.distance_metric = distance_metric
+        self.squared_norms = None
+        if distance_metric != 'cosine':
+            self.squared_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+    @classmethod
+    def from_list_vectors(
+        cls, vectors: List[Dict[str, Any]], dimension: int, distance_metric: str = 'cosine'
+    ) -> 'LocalIndex':
+        """Build an index from the vectors of list_vectors pages fetched with returnData."""
+        matrix = np.empty((len(vectors), dimension), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            matrix[row] = vector['data']['float32']
+        if distance_metric == 'cosine':
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.maximum(norms, np.finfo(np.float32).tiny)
+        return cls(
+            [vector['key'] for vector in vectors],
+            matrix,
+            [vector.get('metadata', {}) for vector in vectors],
+            distance_metric,
+        )
+
+    @property
+    def dimension(self) -> int:
+        """Dimension of the vectors in the index."""
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        """Number of vectors in the index."""
+        return len(self.keys)
+
+    def query(self, query_vector: Sequence[float], top_k: int) -> List[Dict[str, Any]]:
+        """Find the top_k vectors nearest to query_vector.
+
+        Returns:
+            list: nearest vectors first, as {'key', 'distance', 'metadata'} like QueryVectors
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.vectors @ query
+
+        if self.squared_norms is None:
+            # Cosine distance; the rows are unit length, so only the query is normalized
+            distances = 1 - scores / max(float(np.linalg.norm(query)), np.finfo(np.float32).tiny)
+        else:
+            squared = self.squared_norms - 2 * scores + float(query @ query)
+            distances = np.sqrt(np.maximum(squared, 0))
+
+        # Select the top_k rows in linear time, then sort only those
+        if top_k < len(distances):
+            top = np.argpartition(distances, top_k)[:top_k]
+            top = top[np.argsort(distances[top], kind='stable')]
+        else:
+            top = np.argsort(distances, kind='stable')
+        return [
+            {
+                'key': self.keys[row],
+                'distance': float(distances[row]),
+                'metadata': self.metadata[row],
+            }
+            for row in top.tolist()
+        ]
+
+    def save(self, path: str) -> None:
+        """Write the index to path.json (keys, metadata and metric) and a matrix file beside it.
+
+        The vectors go to a new path.<version>.npy that path.json names, and path.json is
+        replaced last, atomically. A concurrent load therefore sees either the old or the new
+        index, never the keys of one with the vectors of the other.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        previous = _read_attributes(path)
+
+        vectors_file = f'{os.path.basename(path)}.{uuid.uuid4().hex}.npy'
+        with open(os.path.join(os.path.dirname(path), vectors_file), 'wb') as f:
+            np.save(f, self.vectors)
+        with open(f'{path}.json.tmp', 'w') as f:
+            json.dump(
+                {
+                    'keys': self.keys,
+                    'metadata': self.metadata,
+                    'distanceMetric': self.distance_metric,
+                    'shape': list(self.vectors.shape),
+                    'vectorsFile': vectors_file,
+                },
+                f,
+            )
+        os.replace(f'{path}.json.tmp', f'{path}.json')
+
+        if previous is not None:
+            _remove_vectors_file(path, previous)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['LocalIndex']:
+        """Read an index written by save.
+
+        Returns:
+            LocalIndex, or None if there is none at path or its files are incomplete or corrupt
+        """
+        attributes = _read_attributes(path)
+        if attributes is None:
+            return None
+
+        try:
+            vectors_file = os.path.basename(attributes['vectorsFile'])
+            vectors = _map_npy(os.path.join(os.path.dirname(path), vectors_file))
+            if (
+                list(vectors.shape) != attributes['shape']
+                or len(attributes['keys']) != vectors.shape[0]
+                or len(attributes['metadata']) != vectors.shape[0]
+            ):
+                raise ValueError(f'{path}.json does not match its vectors {vectors.shape}')
+            return cls(
+                attributes['keys'], vectors, attributes['metadata'], attributes['distanceMetric']
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f'Ignoring the local index at {path}: {str(e)}')
+            return None
+
+    @staticmethod
+    def remove(path: str) -> None:
+        """Delete an index written by save, if there is one at path."""
+        attributes = _read_attributes(path)
+        try:
+            os.remove(f'{path}.json')
+        except FileNotFoundError:
+            pass
+        if attributes is not None:
+            _remove_vectors_file(path, attributes)
+
+
+def _read_attributes(path: str) -> Optional[Dict[str, Any]]:
+    """Read path.json written by LocalIndex.save, or return None if it is missing or corrupt."""
+    try:
+        with open(f'{path}.json') as f:
+            attributes = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f'Ignoring the local index at {path}: {str(e)}')
+        return None
+    return attributes if isinstance(attributes, dict) else None
+
+
+def _remove_vectors_file(path: str, attributes: Dict[str, Any]) -> None:
+    """Delete the matrix file named by the attributes of the index at path, if it exists."""
+    vectors_file = attributes.get('vectorsFile')
+    if isinstance(vectors_file, str):
+        try:
+            os.remove(os.path.join(os.path.dirname(path), os.path.basename(vectors_file)))
+        except FileNotFoundError:
+            pass
+
+
+def _map_npy(path: str) -> np.ndarray:
+    """Memory-map the array in a .npy file read-only, asking the kernel to read it ahead.
+
+    Every query scans the whole matrix, so the pages are prefetched in the background as soon as
+    the file is opened instead of being faulted in one at a time by the first query.
+    """
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), offset, 0, os.POSIX_FADV_WILLNEED)
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if hasattr(mmap, 'MADV_WILLNEED'):
+        buffer.madvise(mmap.MADV_WILLNEED)
+    count = int(np.prod(shape))
+    vectors = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    return vectors.reshape(shape, order='F' if fortran_order else 'C')
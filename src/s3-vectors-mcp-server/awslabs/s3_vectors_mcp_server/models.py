@@ -18,23 +18,73 @@ This module defines the data models used for request and response validation
 in the S3 Vectors MCP server tools.
 """
 
-import os
-import re
 from awslabs.s3_vectors_mcp_server.consts import (
     AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION,
+    DEFAULT_NON_FILTERABLE_METADATA_KEYS,
+    EXT_TO_ALLOWED_MODELS,
     IMAGE_EMBEDDING_MODELS,
     IMAGE_FILE_EXTENSIONS,
+    KMS_KEY_ARN_KEY,
+    MAX_VECTOR_DIMENSION,
     MODALITIES,
+    NON_FILTERABLE_METADATA_KEYS_KEY,
     OUTPUT_FORMATS,
+    SSE_TYPE_AES256,
+    SSE_TYPE_KEY,
     TEXT_EMBEDDING_MODELS,
     TEXT_FILE_EXTENSIONS,
     VALID_S3_KMS_ARN,
+    VALID_S3_KMS_ARN_RE,
+    VALID_S3_SSE_TYPES_SET,
     VECTOR_BUCKET_ARN_PATTERN,
     VECTOR_BUCKET_NAME_PATTERN,
-    VECTOR_INDEX_NAME_PATTERN,
+    VECTOR_INDEX_NAME_CHARS,
+    VECTOR_INDEX_NAME_EDGE_CHARS,
 )
-from pydantic import BaseModel, Field, field_validator, model_validator
-from typing import Any, Dict, List, Literal, Optional
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    PlainSerializer,
+    SkipValidation,
+    StringConstraints,
+    TypeAdapter,
+    field_validator,
+    model_validator,
+)
+from typing import Annotated, Any, Dict, List, Literal, Optional
+from typing_extensions import TypedDict
+
+
+def _validate_index_name(v: str) -> str:
+    """Validate a vector index name using string checks equivalent to VECTOR_INDEX_NAME_PATTERN.
+
+    Length is enforced by the StringConstraints on IndexName, so v is never empty here.
+    """
+    # strip() removes every allowed character in one pass, so anything left is invalid
+    if (
+        v[0] not in VECTOR_INDEX_NAME_EDGE_CHARS
+        or v[-1] not in VECTOR_INDEX_NAME_EDGE_CHARS
+        or v.strip(VECTOR_INDEX_NAME_CHARS)
+    ):
+        raise ValueError(
+            'indexName must contain only lowercase letters, numbers, periods and hyphens, '
+            'and must start and end with a letter or number'
+        )
+    return v
+
+
+# Shared vector index name type, validated once for every model that references it
+IndexName = Annotated[
+    str, StringConstraints(min_length=3, max_length=63), AfterValidator(_validate_index_name)
+]
+
+# Shared literal types, built once at import instead of once per model class
+TextEmbeddingModelId = Literal[tuple(TEXT_EMBEDDING_MODELS)]
+EmbeddingModelId = Literal[tuple(TEXT_EMBEDDING_MODELS + IMAGE_EMBEDDING_MODELS)]
+Modality = Literal[tuple(MODALITIES)]
+OutputFormat = Literal[tuple(OUTPUT_FORMATS)]
 
 
 # All Helper Classes
@@ -49,7 +99,8 @@ from typing import Any, Dict, List, Literal, Optional
 class VectorData(BaseModel):
     """Vector data - each element is of type float32."""
 
-    float32: List[float]
+    # Length is checked before the elements, so oversized vectors are rejected up front
+    float32: List[float] = Field(min_length=1, max_length=MAX_VECTOR_DIMENSION)
 
 
 class QueryVector(BaseModel):
@@ -63,19 +114,39 @@ class InputVector(BaseModel):
 
     key: str
     data: VectorData
-    metadata: Optional[Dict[str, Any]] = None
+    # Opaque user payload passed through to S3 Vectors as-is, so skip walking its entries
+    metadata: Optional[SkipValidation[Dict[str, Any]]] = None
+
+
+# Validates a whole batch of input vectors in one call, e.g. a put_vectors payload
+InputVectorListAdapter = TypeAdapter(List[InputVector])
 
 
-class Pagination(BaseModel):
+class Pagination(TypedDict):
     """Pagination token container."""
 
-    next_token: Optional[str] = Field(default=None, alias='nextToken')
+    nextToken: str
+
+
+# Pagination token as accepted from clients, passed to boto3 as the bare token string
+PaginationToken = Annotated[Pagination, PlainSerializer(lambda p: p['nextToken'], return_type=str)]
+
+
+class BaseRequest(BaseModel):
+    """Base class for tool request models.
+
+    Requests are immutable once validated and reject unknown fields. Validators are
+    built on first use rather than at import, so importing this module stays cheap
+    for callers that only need a few of the models.
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True, defer_build=True)
 
 
 ###### S3 Vector Bucket Classes
 
 
-class CreateVectorBucketRequest(BaseModel):
+class CreateVectorBucketRequest(BaseRequest):
     """Request model for create_vector_bucket."""
 
     vectorBucketName: str = Field(
@@ -88,41 +159,44 @@ class CreateVectorBucketRequest(BaseModel):
             'By default, if you don’t specify, all new vectors in Amazon S3 vector buckets '
             'use server-side encryption with Amazon S3 managed keys (SSE-S3), specifically AES256.'
         ),
-        default_factory=lambda: AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION,
+        default_factory=AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION.copy,
     )
 
-    @model_validator(mode='before')
+    @field_validator('encryptionConfiguration', mode='before')
     def _validate_encryption(cls, values: Any) -> Dict[str, Any]:
         """Ensuring that S3 Vector Bucket encryption params are either AES256 or KMS + KMS ARN."""
         # Default to AES256 if not provided / falsy
         if not values:
-            return AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION
+            return AWS_S3_BUCKET_ENCRYPTION_CONFIGURATION.copy()
 
         if not isinstance(values, dict):
             raise TypeError('encryptionConfiguration must be a dict')
 
-        # Ensure sseType is present and valid
-        sse = values.get('sseType', 'AES256')
-        if sse not in ('AES256', 'aws:kms'):
+        # Default to AES256 when sseType is missing; this path needs no further checks
+        sse = values.get(SSE_TYPE_KEY, SSE_TYPE_AES256)
+        if sse == SSE_TYPE_AES256:
+            values[SSE_TYPE_KEY] = sse  # normalize if missing
+            return values
+
+        if sse not in VALID_S3_SSE_TYPES_SET:
             raise ValueError("encryptionConfiguration.sseType must be 'AES256' or 'aws:kms'")
-        values['sseType'] = sse  # normalize if missing
 
-        # Require kmsKeyArn when aws:kms is selected
-        if sse == 'aws:kms':
-            if not values.get('kmsKeyArn'):
-                raise ValueError(
-                    "encryptionConfiguration.kmsKeyArn is required when sseType is 'aws:kms'"
-                )
+        # Require a valid kmsKeyArn when aws:kms is selected
+        kms_key_arn = values.get(KMS_KEY_ARN_KEY)
+        if not kms_key_arn:
+            raise ValueError(
+                "encryptionConfiguration.kmsKeyArn is required when sseType is 'aws:kms'"
+            )
 
-            if not re.match(VALID_S3_KMS_ARN, values.get('kmsKeyArn')):
-                raise ValueError(
-                    f'encryptionConfiguration.kmsKeyArn is required to match {VALID_S3_KMS_ARN}'
-                )
+        if not VALID_S3_KMS_ARN_RE.match(kms_key_arn):
+            raise ValueError(
+                f'encryptionConfiguration.kmsKeyArn is required to match {VALID_S3_KMS_ARN}'
+            )
 
         return values
 
 
-class GetVectorBucketRequest(BaseModel):
+class GetVectorBucketRequest(BaseRequest):
     """Request model for get_vector_bucket."""
 
     vectorBucketName: str = Field(
@@ -137,13 +211,13 @@ class GetVectorBucketRequest(BaseModel):
     )
 
 
-class ListVectorBucketRequest(BaseModel):
+class ListVectorBucketRequest(BaseRequest):
     """Request model for list_vector_bucket."""
 
     maxResults: Optional[int] = Field(
         description='The maximum number of vector buckets to return.', default=None
     )
-    nextToken: Optional[Pagination] = Field(
+    nextToken: Optional[PaginationToken] = Field(
         description='Pagination token from a previous response, to retrieve the next page.',
         default=None,
     )
@@ -156,7 +230,7 @@ class ListVectorBucketRequest(BaseModel):
 ###### S3 Vector Index Classes
 
 
-class CreateIndexRequest(BaseModel):
+class CreateIndexRequest(BaseRequest):
     """Request model for create_index."""
 
     vectorBucketName: str = Field(
@@ -170,13 +244,11 @@ class CreateIndexRequest(BaseModel):
         default=None,
     )
 
-    indexName: str = Field(
-        description='The name of the vector index to create.', pattern=VECTOR_INDEX_NAME_PATTERN
-    )
+    indexName: IndexName = Field(description='The name of the vector index to create.')
     dimension: int = Field(
         description='The dimensions of the vectors to be inserted into the vector index.',
         ge=1,
-        le=4096,
+        le=MAX_VECTOR_DIMENSION,
     )
 
     dataType: Optional[str] = Field(
@@ -194,23 +266,13 @@ class CreateIndexRequest(BaseModel):
 
     metadataConfiguration: Optional[Dict] = Field(
         description="The metadata configuration for the vector index. Provide a list of nonFilterableMetadataKeys. Defaults to ['S3VECTORS-EMBED-SRC-CONTENT', 'S3VECTORS-EMBED-SRC-LOCATION']",
-        default={
-            'nonFilterableMetadataKeys': [
-                'S3VECTORS-EMBED-SRC-CONTENT',
-                'S3VECTORS-EMBED-SRC-LOCATION',
-            ]
+        default_factory=lambda: {
+            NON_FILTERABLE_METADATA_KEYS_KEY: list(DEFAULT_NON_FILTERABLE_METADATA_KEYS)
         },
     )
 
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
 
-
-class GetIndexRequest(BaseModel):
+class GetIndexRequest(BaseRequest):
     """Request model for get_index."""
 
     vectorBucketName: str = Field(
@@ -218,24 +280,14 @@ class GetIndexRequest(BaseModel):
         pattern=VECTOR_BUCKET_NAME_PATTERN,
     )
 
-    indexName: str = Field(
-        description='The name of the vector index.',
-        pattern=VECTOR_INDEX_NAME_PATTERN,
-    )
+    indexName: IndexName = Field(description='The name of the vector index.')
 
     # indexArn: Optional[str] = Field(
     #     description='The ARN of the vector index.', pattern=VECTOR_INDEX_ARN_PATTERN
     # )
 
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
-
 
-class ListIndexesRequest(BaseModel):
+class ListIndexesRequest(BaseRequest):
     """Request model for list_indexes."""
 
     vectorBucketName: str = Field(
@@ -253,7 +305,7 @@ class ListIndexesRequest(BaseModel):
         description='The maximum number of items to be returned in the response.', default=None
     )
 
-    nextToken: Optional[Pagination] = Field(
+    nextToken: Optional[PaginationToken] = Field(
         default=None,
         description='Pagination token from a previous response, to retrieve the next page.',
     )
@@ -267,16 +319,14 @@ class ListIndexesRequest(BaseModel):
 ###### S3 Vectors Classes
 
 
-class ListVectorsRequest(BaseModel):
+class ListVectorsRequest(BaseRequest):
     """Request model for list_vectors."""
 
     vectorBucketName: str = Field(
         description='The name of the vector bucket.', pattern=VECTOR_BUCKET_NAME_PATTERN
     )
 
-    indexName: str = Field(
-        description='Name of the vector index', pattern=VECTOR_INDEX_NAME_PATTERN
-    )
+    indexName: IndexName = Field(description='Name of the vector index')
 
     # indexArn: Optional[str] = Field(
     #     description="ARN of the vector index",
@@ -284,10 +334,22 @@ class ListVectorsRequest(BaseModel):
     # )
 
     maxResults: Optional[int] = Field(
-        description='Maximum number of vectors to return on a page (default 500 if not specified).'
+        description='Maximum number of vectors to return on a page (default 500 if not specified).',
+        default=None,
     )
 
-    nextToken: Optional[Pagination] = Field(description='Pagination token from a previous request')
+    nextToken: Optional[PaginationToken] = Field(
+        description='Pagination token from a previous request', default=None
+    )
+
+    maxPages: int = Field(
+        default=1,
+        ge=1,
+        description=(
+            'Maximum number of pages to fetch and combine into one response. '
+            'The response nextToken continues after the last page fetched.'
+        ),
+    )
 
     segmentCount: Optional[int] = Field(
         None,
@@ -310,66 +372,97 @@ class ListVectorsRequest(BaseModel):
         description='If true, include vector metadata in the response (requires GetVectors permission)',
     )
 
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
+    returnDataAsBase64: Optional[bool] = Field(
+        None,
+        description=(
+            'If true, return vector data as {"float32_base64": "..."}: the base64 of the '
+            'little-endian float32 values, about a quarter of the size of the float32 list. '
+            'Decode with numpy.frombuffer(base64.b64decode(value), dtype="<f4").'
+        ),
+    )
 
 
-class EmbedAndStoreTextRequest(BaseModel):
+class EmbedAndStoreTextRequest(BaseRequest):
     """Request model for s3vectors-embed put with --text-value requests."""
 
     vectorBucketName: str = Field(
         description='The name of the vector bucket.', pattern=VECTOR_BUCKET_NAME_PATTERN
     )
 
-    indexName: str = Field(
-        description='Name of the vector index', pattern=VECTOR_INDEX_NAME_PATTERN
-    )
+    indexName: IndexName = Field(description='Name of the vector index')
 
-    modelId: Literal[tuple(TEXT_EMBEDDING_MODELS)] = Field(
+    modelId: TextEmbeddingModelId = Field(
         description='Model ID to be used for embedding', default=TEXT_EMBEDDING_MODELS[0]
     )
 
     textValue: str = Field(description='input text to be validated')
 
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
 
+class EmbedAndStoreTextsBatchRequest(BaseRequest):
+    """Request model for embedding and storing many texts in one vector index."""
+
+    vectorBucketName: str = Field(
+        description='The name of the vector bucket.', pattern=VECTOR_BUCKET_NAME_PATTERN
+    )
+
+    indexName: IndexName = Field(description='Name of the vector index')
+
+    modelId: TextEmbeddingModelId = Field(
+        description='Model ID to be used for embedding', default=TEXT_EMBEDDING_MODELS[0]
+    )
+
+    textValues: List[str] = Field(min_length=1, description='input texts, one vector per text')
+
+    # Opaque user payloads passed through to S3 Vectors as-is, like InputVector.metadata
+    metadata: Optional[List[SkipValidation[Dict[str, Any]]]] = Field(
+        default=None,
+        description='Metadata to store with each text, in the same order as textValues.',
+    )
 
-class EmbedAndStoreFileRequest(BaseModel):
+    metadataColumns: Optional[Dict[str, SkipValidation[List[Any]]]] = Field(
+        default=None,
+        description=(
+            'Metadata for every text as columns instead of one dict per text: each key maps to '
+            'a list with one value per text, in the same order as textValues. '
+            'Cannot be combined with metadata.'
+        ),
+    )
+
+    @model_validator(mode='after')
+    def validate_metadata_per_text(self):
+        """Ensuring that metadata, when given, has one entry per text."""
+        if self.metadata is not None and self.metadataColumns is not None:
+            raise ValueError('Specify either metadata or metadataColumns, not both.')
+
+        if self.metadata is not None and len(self.metadata) != len(self.textValues):
+            raise ValueError(
+                f'metadata has {len(self.metadata)} entries but textValues has {len(self.textValues)}.'
+            )
+
+        for key, column in (self.metadataColumns or {}).items():
+            if not isinstance(column, list) or len(column) != len(self.textValues):
+                raise ValueError(
+                    f"metadataColumns['{key}'] must be a list with one value per text."
+                )
+        return self
+
+
+class EmbedAndStoreFileRequest(BaseRequest):
     """Request model for s3vectors-embed put with --text requests."""
 
     vectorBucketName: str = Field(
         description='The name of the vector bucket.', pattern=VECTOR_BUCKET_NAME_PATTERN
     )
 
-    indexName: str = Field(
-        description='Name of the vector index', pattern=VECTOR_INDEX_NAME_PATTERN
-    )
+    indexName: IndexName = Field(description='Name of the vector index')
 
-    modelId: Literal[tuple(TEXT_EMBEDDING_MODELS + IMAGE_EMBEDDING_MODELS)] = Field(
+    modelId: EmbeddingModelId = Field(
         description='Model ID to be used for embedding', default=TEXT_EMBEDDING_MODELS[0]
     )
 
     file: str = Field(description='local file that needs to get embedded and stored')
 
-    modality: Literal[tuple(MODALITIES)] = Field(
-        description='the modality of the file(s)', default=MODALITIES[0]
-    )
-
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
+    modality: Modality = Field(description='the modality of the file(s)', default=MODALITIES[0])
 
     @model_validator(mode='before')
     def validate_model_for_file_type(cls, values):
@@ -380,51 +473,39 @@ class EmbedAndStoreFileRequest(BaseModel):
         if not file_path or not model_id:
             return values  # Let Pydantic handle missing fields
 
-        ext = os.path.splitext(file_path)[1].lower()
+        # Same result as os.path.splitext: leading dots of the file name do not start an extension
+        head, _, tail = file_path.rpartition('/')[2].rpartition('.')
+        ext = '.' + tail.lower() if head.strip('.') else ''
 
-        if ext in TEXT_FILE_EXTENSIONS:
-            if model_id not in TEXT_EMBEDDING_MODELS:
-                raise ValueError(
-                    f"Model ID '{model_id}' is not valid for text file type '{ext}'. Must be one of {TEXT_EMBEDDING_MODELS}."
-                )
-        elif ext in IMAGE_FILE_EXTENSIONS:
-            if model_id not in IMAGE_EMBEDDING_MODELS:
-                raise ValueError(
-                    f"Model ID '{model_id}' is not valid for image file type '{ext}'. Must be one of {IMAGE_EMBEDDING_MODELS}."
-                )
-        else:
+        allowed_models = EXT_TO_ALLOWED_MODELS.get(ext)
+        if allowed_models is None:
             raise ValueError(
                 f"Unsupported file extension '{ext}'. Supported text types: {TEXT_FILE_EXTENSIONS}. Image types: {IMAGE_FILE_EXTENSIONS}."
             )
+        if model_id not in allowed_models:
+            raise ValueError(
+                f"Model ID '{model_id}' is not valid for file type '{ext}'. Must be one of {sorted(allowed_models)}."
+            )
 
         return values
 
 
-class EmbedAndStoreS3ObjectsRequest(BaseModel):
+class EmbedAndStoreS3ObjectsRequest(BaseRequest):
     """Request model for s3vectors-embed put with --text requests with S3 URIs."""
 
     vectorBucketName: str = Field(
         description='The name of the vector bucket.', pattern=VECTOR_BUCKET_NAME_PATTERN
     )
 
-    indexName: str = Field(
-        description='Name of the vector index', pattern=VECTOR_INDEX_NAME_PATTERN
-    )
+    indexName: IndexName = Field(description='Name of the vector index')
 
-    modelId: Literal[tuple(TEXT_EMBEDDING_MODELS + IMAGE_EMBEDDING_MODELS)] = Field(
+    modelId: EmbeddingModelId = Field(
         description='Model ID to be used for embedding', default=TEXT_EMBEDDING_MODELS[0]
     )
 
     s3_path: str = Field(description='S3 file that needs to get embedded and stored')
 
-    modality: Literal[tuple(MODALITIES)] = Field(description='the modality of the file(s)')
-
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
+    modality: Modality = Field(description='the modality of the file(s)')
 
     # @model_validator(mode='before')
     # def validate_model_for_file_type(cls, values):
@@ -451,7 +532,7 @@ class EmbedAndStoreS3ObjectsRequest(BaseModel):
     #     return values
 
 
-class EmbedAndQueryTextRequest(BaseModel):
+class EmbedAndQueryTextRequest(BaseRequest):
     """Request model for s3vectors-embed query requests."""
 
     vectorBucketName: str = Field(
@@ -459,9 +540,8 @@ class EmbedAndQueryTextRequest(BaseModel):
         pattern=VECTOR_BUCKET_NAME_PATTERN,
     )
 
-    indexName: str = Field(
-        description='The name of the vector index that you want to query.',
-        pattern=VECTOR_INDEX_NAME_PATTERN,
+    indexName: IndexName = Field(
+        description='The name of the vector index that you want to query.'
     )
 
     modelId: str = Field(
@@ -473,7 +553,9 @@ class EmbedAndQueryTextRequest(BaseModel):
     # Optional args
 
     topK: Optional[str] = Field(
-        description='The number of results to return for each query.', default='5'
+        description='The number of results to return for each query, as a positive integer.',
+        default='5',
+        pattern=r'^[1-9][0-9]*$',
     )
 
     filter: Optional[Dict[str, Any]] = Field(
@@ -490,13 +572,30 @@ class EmbedAndQueryTextRequest(BaseModel):
         description='Indicates whether to include metadata in the response. The default value is false.',
     )
 
-    output: Optional[Literal[tuple(OUTPUT_FORMATS)]] = Field(
+    output: Optional[OutputFormat] = Field(
         description='Output format, json or table', default=OUTPUT_FORMATS[0]
     )
 
-    @field_validator('indexName')
-    def check_length(cls, v: str) -> str:
-        """Ensuring that index name is between 3 and 63 characters long."""
-        if not (3 <= len(v) <= 63):
-            raise ValueError('indexName must be between 3 and 63 characters long')
-        return v
+    bypassCache: bool = Field(
+        default=False,
+        description='Query S3 Vectors even if a cached result for this query exists. The fresh result is cached.',
+    )
+
+
+class EmbedAndQueryBatchRequest(BaseRequest):
+    """Request model for running several embed_and_query requests together."""
+
+    queries: List[EmbedAndQueryTextRequest] = Field(
+        min_length=1, description='Queries to run; results are returned in the same order.'
+    )
+
+
+class WarmLocalIndexRequest(BaseRequest):
+    """Request model for warm_local_index."""
+
+    vectorBucketName: str = Field(
+        description='The name of the vector bucket that contains the vector index.',
+        pattern=VECTOR_BUCKET_NAME_PATTERN,
+    )
+
+    indexName: IndexName = Field(description='The name of the vector index to copy locally.')
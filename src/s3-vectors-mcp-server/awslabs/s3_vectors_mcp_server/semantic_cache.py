@@ -0,0 +1,149 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Semantic cache of query results for the S3 Vectors MCP server."""
+
+import numpy as np
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Sequence
+
+
+# Rows allocated for a scope's first entries; capacity doubles up to max_entries as it fills
+_INITIAL_CAPACITY = 16
+
+
+class _ScopeEntries:
+    """Entries of one scope: unit-normalized float32 embeddings in a contiguous matrix.
+
+    Rows are used as a ring buffer once max_entries are stored, so the oldest row is replaced.
+    """
+
+    def __init__(self, dimension: int, max_entries: int):
+        """Create an empty set of entries for embeddings of the given dimension."""
+        self.max_entries = max_entries
+        capacity = min(_INITIAL_CAPACITY, max_entries)
+        self.embeddings = np.empty((capacity, dimension), dtype=np.float32)
+        self.expires = np.empty(capacity, dtype=np.float64)
+        self.values: List[Any] = []
+        self.next_row = 0
+        # Every entry is stored with the same TTL, so the newest one expires last
+        self.last_expires = 0.0
+
+    def add(self, embedding: np.ndarray, expires: float, value: Any) -> None:
+        """Store a normalized embedding, replacing the oldest entry when full."""
+        row = self.next_row
+        if row == len(self.embeddings) and row < self.max_entries:
+            capacity = min(2 * row, self.max_entries)
+            self.embeddings = np.resize(self.embeddings, (capacity, self.embeddings.shape[1]))
+            self.expires = np.resize(self.expires, capacity)
+
+        self.embeddings[row] = embedding
+        self.expires[row] = expires
+        self.last_expires = expires
+        if row == len(self.values):
+            self.values.append(value)
+        else:
+            self.values[row] = value
+        self.next_row = (row + 1) % self.max_entries
+
+
+def _normalize(embedding: Sequence[float]) -> np.ndarray:
+    """Return embedding as a unit-length float32 vector (all zeros if it has no length)."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """Cache results by query embedding, reusing them for sufficiently similar queries.
+
+    Entries are grouped by scope (everything about a query except its text, e.g. index, model,
+    topK and filter); a lookup only matches entries of the same scope whose cosine similarity
+    with the query embedding is at least threshold. Entries expire ttl seconds after they are
+    stored, and each scope keeps at most max_entries, replacing the oldest first. At most
+    max_scopes scopes are kept: a scope is dropped once all of its entries have expired, or when
+    a new scope needs room and it is the least recently used.
+
+    Embeddings are normalized when stored, so scoring a lookup is a single matrix-vector
+    product over the scope's entries.
+    """
+
+    def __init__(self, threshold: float, ttl: float, max_entries: int, max_scopes: int):
+        """Create an empty cache."""
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        # Least recently used scope first
+        self._scopes: 'OrderedDict[Hashable, _ScopeEntries]' = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores and matches anything."""
+        return self.threshold > 0 and self.ttl > 0
+
+    def get(self, scope: Hashable, embedding: Sequence[float], default: Any = None) -> Any:
+        """Return the value of the most similar live entry in scope, or default."""
+        entries = self._scopes.get(scope)
+        if entries is None:
+            return default
+
+        now = time.monotonic()
+        if entries.last_expires <= now:
+            del self._scopes[scope]
+            return default
+        self._scopes.move_to_end(scope)
+
+        query = _normalize(embedding)
+        if query.shape[0] != entries.embeddings.shape[1]:
+            return default
+
+        count = len(entries.values)
+        scores = entries.embeddings[:count] @ query
+        scores[entries.expires[:count] <= now] = -np.inf
+
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return default
+        return entries.values[best]
+
+    def set(self, scope: Hashable, embedding: Sequence[float], value: Any) -> None:
+        """Cache value for a query with the given embedding in scope."""
+        if not self.enabled:
+            return
+
+        vector = _normalize(embedding)
+        now = time.monotonic()
+        entries = self._scopes.get(scope)
+        if entries is None or entries.embeddings.shape[1] != vector.shape[0]:
+            self._scopes.pop(scope, None)
+            self._evict(now)
+            entries = self._scopes[scope] = _ScopeEntries(vector.shape[0], self.max_entries)
+        else:
+            self._scopes.move_to_end(scope)
+
+        entries.add(vector, now + self.ttl, value)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired scopes, then the least recently used ones until a new scope fits."""
+        expired = [scope for scope, entries in self._scopes.items() if entries.last_expires <= now]
+        for scope in expired:
+            del self._scopes[scope]
+        while len(self._scopes) >= self.max_scopes:
+            self._scopes.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        self._scopes.clear()
@@ -20,40 +20,175 @@ Note: The tools provided by this MCP server are intended for development and pro
 purposes only and are not meant for production use cases.
 """
 
-import subprocess
-from awslabs.s3_vectors_mcp_server.consts import SERVER_NAME
+import asyncio
+import itertools
+import os
+import sys
+import uuid
+from awslabs.s3_vectors_mcp_server.consts import (
+    DEFAULT_PUT_VECTORS_MAX_CONCURRENCY,
+    DEFAULT_S3VECTORS_WRITE_MAX_CONCURRENCY,
+    DIRECT_QUERY_EMBEDDING_MODELS,
+    EMBED_SRC_CONTENT_METADATA_KEY,
+    METADATA_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_SEMANTIC_CACHE_MAX_SCOPES,
+    SERVER_NAME,
+)
+from awslabs.s3_vectors_mcp_server.embeddings import (
+    EmbeddingCache,
+    MicroBatcher,
+    embed_text_batch,
+)
 from awslabs.s3_vectors_mcp_server.helpers import (
+    LoopSemaphore,
+    TTLCache,
+    encode_vectors_data_base64,
+    get_bedrock_runtime_client,
+    get_embed_batch_settings,
+    get_embedding_cache_path,
+    get_local_index_dir,
+    get_metadata_cache_ttl,
+    get_put_vectors_batch_settings,
+    get_query_cache_settings,
     get_s3_vectors_client,
     get_s3vectors_cli_global_config,
+    get_s3vectors_put_optional_config,
     get_s3vectors_query_optional_config,
+    parse_s3vectors_cli_batch_output,
+    run_s3vectors_embed,
 )
+from awslabs.s3_vectors_mcp_server.local_index import LocalIndex
 from awslabs.s3_vectors_mcp_server.models import (
+    BaseRequest,
     CreateIndexRequest,
     CreateVectorBucketRequest,
+    EmbedAndQueryBatchRequest,
     EmbedAndQueryTextRequest,
     EmbedAndStoreFileRequest,
     EmbedAndStoreS3ObjectsRequest,
     EmbedAndStoreTextRequest,
+    EmbedAndStoreTextsBatchRequest,
     GetIndexRequest,
     GetVectorBucketRequest,
     ListIndexesRequest,
     ListVectorBucketRequest,
     ListVectorsRequest,
+    WarmLocalIndexRequest,
 )
+from awslabs.s3_vectors_mcp_server.semantic_cache import SemanticCache
 from loguru import logger
 from mcp.server.fastmcp import FastMCP
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 
-# Initialize S3 Vectors Client
+# Initialize S3 Vectors and Bedrock Runtime Clients
 s3v = get_s3_vectors_client()
+bedrock = get_bedrock_runtime_client()
 
 # Initialize s3-vectors-embed-cli global config
 S3_VECTORS_GLOBAL_CONFIG = get_s3vectors_cli_global_config()
+S3_VECTORS_PUT_COMMAND = ('s3vectors-embed', *S3_VECTORS_GLOBAL_CONFIG, 'put')
+S3_VECTORS_PUT_OPTIONAL_CONFIG = get_s3vectors_put_optional_config()
+S3_VECTORS_QUERY_COMMAND = ('s3vectors-embed', *S3_VECTORS_GLOBAL_CONFIG, 'query')
+
+# ListVectorsRequest fields that shape the tool response rather than the ListVectors call
+LIST_VECTORS_TOOL_ONLY_FIELDS = {'maxPages', 'returnDataAsBase64'}
+
+# Bounds the create calls that run at the same time on worker threads
+write_semaphore = LoopSemaphore(
+    int(os.environ.get('S3VECTORS_WRITE_MAX_CONCURRENCY', DEFAULT_S3VECTORS_WRITE_MAX_CONCURRENCY))
+)
+
+# Text embeddings kept across restarts, when S3VECTORS_EMBED_CACHE_PATH is set
+EMBED_CACHE_PATH = get_embedding_cache_path()
+embedding_cache = EmbeddingCache(EMBED_CACHE_PATH) if EMBED_CACHE_PATH else None
+
+# Responses of the read-only bucket and index tools, invalidated by the create tools
+metadata_cache = TTLCache(get_metadata_cache_ttl(), maxsize=METADATA_CACHE_MAX_ENTRIES)
+
+# Results of embed_and_query, by exact request and (when enabled) by query text embedding;
+# cleared whenever this server writes vectors
+QUERY_CACHE_TTL, QUERY_SEMANTIC_CACHE_THRESHOLD = get_query_cache_settings()
+query_cache = TTLCache(QUERY_CACHE_TTL, maxsize=QUERY_CACHE_MAX_ENTRIES)
+semantic_query_cache = SemanticCache(
+    QUERY_SEMANTIC_CACHE_THRESHOLD,
+    QUERY_CACHE_TTL,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_SEMANTIC_CACHE_MAX_SCOPES,
+)
+# Number of writes to each (bucket, index), so that a query that overlapped a write is not cached
+index_writes: Dict[Tuple[str, str], int] = {}
+
+# Local copies of vector indexes that embed_and_query searches instead of S3 Vectors, by
+# (bucket, index); persisted in LOCAL_INDEX_DIR, when S3VECTORS_LOCAL_INDEX_DIR is set
+LOCAL_INDEX_DIR = get_local_index_dir()
+local_indexes: Dict[Tuple[str, str], LocalIndex] = {}
+
+# The request models defer their schema builds so that importing them stays cheap. The server
+# serializes every one of them, so build them now instead of on the first call of each tool.
+for request_model in (
+    CreateVectorBucketRequest,
+    ListVectorBucketRequest,
+    GetVectorBucketRequest,
+    CreateIndexRequest,
+    GetIndexRequest,
+    ListIndexesRequest,
+    ListVectorsRequest,
+    EmbedAndStoreTextRequest,
+    EmbedAndStoreTextsBatchRequest,
+    EmbedAndStoreFileRequest,
+    EmbedAndStoreS3ObjectsRequest,
+    EmbedAndQueryBatchRequest,
+    EmbedAndQueryTextRequest,
+    WarmLocalIndexRequest,
+):
+    request_model.model_rebuild()
 
 # Initialize the MCP server
 mcp = FastMCP(SERVER_NAME)
 enable_aws_resource_write = False
 
+
+async def _cached_call(cache: TTLCache, key, call):
+    """Return the cached response for key, or run call on a worker thread and cache its result."""
+    response = cache.get(key)
+    if response is None:
+        response = await asyncio.to_thread(call)
+        cache.set(key, response)
+    return response
+
+
+async def _call_s3_vectors(
+    operation: str,
+    request: BaseRequest,
+    exclude: Optional[Set[str]] = None,
+    cache: Optional[TTLCache] = None,
+):
+    """Call an S3 Vectors client operation on a worker thread with the fields of request that are not None.
+
+    Args:
+        operation: name of the S3 Vectors client method, e.g. 'get_index'
+        request: the validated tool request
+        exclude: request fields that are not parameters of the operation
+        cache: TTLCache to serve the response from, keyed by operation and request
+
+    Returns:
+        dict: the operation response
+    """
+    method = getattr(s3v, operation)
+    if cache is None:
+        return await asyncio.to_thread(
+            method, **request.model_dump(exclude_none=True, exclude=exclude)
+        )
+
+    return await _cached_call(
+        cache,
+        (operation, request.model_dump_json(exclude_none=True, exclude=exclude)),
+        lambda: method(**request.model_dump(exclude_none=True, exclude=exclude)),
+    )
+
+
 ###### S3 Vector Bucket Tools
 
 
@@ -69,7 +204,11 @@ async def create_vector_bucket(create_vector_bucket_request: CreateVectorBucketR
     """
     logger.info('tool-name: create_vector_bucket')
 
-    return s3v.create_vector_bucket(**create_vector_bucket_request.dict(exclude_none=True))
+    async with write_semaphore:
+        response = await _call_s3_vectors('create_vector_bucket', create_vector_bucket_request)
+    metadata_cache.clear()
+
+    return response
 
 
 @mcp.tool()
@@ -95,7 +234,15 @@ async def list_vector_buckets(list_vector_bucket_request: ListVectorBucketReques
     """
     logger.info('tool-name: list_vector_buckets')
 
-    return s3v.list_vector_buckets(**list_vector_bucket_request.dict(exclude_none=True))
+    # Usually called without any arguments, which needs no serialization
+    if not list_vector_bucket_request.model_fields_set:
+        return await _cached_call(
+            metadata_cache, ('list_vector_buckets', '{}'), s3v.list_vector_buckets
+        )
+
+    return await _call_s3_vectors(
+        'list_vector_buckets', list_vector_bucket_request, cache=metadata_cache
+    )
 
 
 @mcp.tool()
@@ -118,7 +265,9 @@ async def get_vector_bucket(get_vector_bucket_request: GetVectorBucketRequest):
     """
     logger.info('tool-name: get_vector_bucket')
 
-    return s3v.get_vector_bucket(**get_vector_bucket_request.dict(exclude_none=True))
+    return await _call_s3_vectors(
+        'get_vector_bucket', get_vector_bucket_request, cache=metadata_cache
+    )
 
 
 ###### S3 Vector Index Tools
@@ -132,7 +281,11 @@ async def create_index(create_index_request: CreateIndexRequest):
     """
     logger.info('tool-name: create_index')
 
-    return s3v.create_index(**create_index_request.dict(exclude_none=True))
+    async with write_semaphore:
+        response = await _call_s3_vectors('create_index', create_index_request)
+    metadata_cache.clear()
+
+    return response
 
 
 @mcp.tool()
@@ -160,7 +313,7 @@ async def get_index(get_index_request: GetIndexRequest):
     """
     logger.info('tool-name: get_index')
 
-    return s3v.get_index(**get_index_request.dict(exclude_none=True))
+    return await _call_s3_vectors('get_index', get_index_request, cache=metadata_cache)
 
 
 @mcp.tool()
@@ -188,7 +341,7 @@ async def list_indexes(list_indexes_request: ListIndexesRequest):
     """
     logger.info('tool-name: list_indexes')
 
-    return s3v.list_indexes(**list_indexes_request.dict(exclude_none=True))
+    return await _call_s3_vectors('list_indexes', list_indexes_request, cache=metadata_cache)
 
 
 ###### S3 Vector Operations Tools
@@ -220,39 +373,221 @@ async def list_vectors(list_vectors_request: ListVectorsRequest):
                      },
                 ]
             }
+
+        With returnDataAsBase64, 'data' is {'float32_base64': 'string'} instead.
     """
     logger.info('tool-name: list_vectors')
 
-    return s3v.list_vectors(**list_vectors_request.dict(exclude_none=True))
+    if list_vectors_request.maxPages == 1:
+        response = await _call_s3_vectors(
+            'list_vectors', list_vectors_request, exclude=LIST_VECTORS_TOOL_ONLY_FIELDS
+        )
+        if list_vectors_request.returnDataAsBase64:
+            encode_vectors_data_base64(response['vectors'])
+        return response
+
+    vectors = []
+    next_token = None
+    async for page in _iter_pages(
+        'list_vectors',
+        list_vectors_request.model_dump(exclude_none=True, exclude=LIST_VECTORS_TOOL_ONLY_FIELDS),
+        list_vectors_request.maxPages,
+    ):
+        if list_vectors_request.returnDataAsBase64:
+            encode_vectors_data_base64(page['vectors'])
+        vectors.extend(page['vectors'])
+        next_token = page.get('nextToken')
+
+    response = {'vectors': vectors}
+    if next_token:
+        response['nextToken'] = next_token
+    return response
+
+
+async def _iter_pages(operation: str, params: Dict[str, Any], max_pages: Optional[int] = None):
+    """Yield up to max_pages pages of a paginated S3 Vectors operation.
+
+    The next page is fetched on a worker thread while the caller processes the current one.
+
+    Args:
+        operation: name of the S3 Vectors client method, e.g. 'list_vectors'
+        params: parameters of the first call; nextToken is replaced on each following call
+        max_pages: maximum number of pages to fetch, or None for every page
+    """
+    method = getattr(s3v, operation)
+    next_page = asyncio.ensure_future(asyncio.to_thread(method, **params))
+    try:
+        for page_number in itertools.count(1):
+            page = await next_page
+            next_token = page.get('nextToken')
+            if not next_token or page_number == max_pages:
+                yield page
+                return
+
+            next_page = asyncio.ensure_future(
+                asyncio.to_thread(method, **{**params, 'nextToken': next_token})
+            )
+            yield page
+    finally:
+        next_page.cancel()
+
+
+async def _get_index(vector_bucket_name: str, index_name: str) -> Dict[str, Any]:
+    """Get the attributes of a vector index, sharing get_index's cached response."""
+    get_index_request = GetIndexRequest(vectorBucketName=vector_bucket_name, indexName=index_name)
+    response = await _call_s3_vectors('get_index', get_index_request, cache=metadata_cache)
+    return response['index']
+
+
+async def _put_vectors_batch(key, vectors):
+    """Store vectors for one (bucket, index) with a single PutVectors request."""
+    vector_bucket_name, index_name = key
+
+    # Embeddings are float32 arrays until here; PutVectors takes lists of floats
+    vectors = [
+        {**vector, 'data': {'float32': vector['data']['float32'].tolist()}} for vector in vectors
+    ]
+    async with put_vectors_semaphore:
+        await asyncio.to_thread(
+            s3v.put_vectors,
+            vectorBucketName=vector_bucket_name,
+            indexName=index_name,
+            vectors=vectors,
+        )
+    _index_written(vector_bucket_name, index_name)
+    return [None] * len(vectors)
+
+
+# Coalesces vectors written concurrently to the same index into PutVectors requests of at most
+# MAX_PUT_VECTORS_BATCH_SIZE vectors, of which a bounded number run at the same time
+put_vectors_buffer = MicroBatcher(_put_vectors_batch, *get_put_vectors_batch_settings())
+put_vectors_semaphore = LoopSemaphore(
+    int(
+        os.environ.get(
+            'S3VECTORS_PUT_VECTORS_MAX_CONCURRENCY', DEFAULT_PUT_VECTORS_MAX_CONCURRENCY
+        )
+    )
+)
+
+
+async def _embed_and_store_texts(
+    vector_bucket_name: str, index_name: str, model_id: str, texts, metadata=None
+):
+    """Embed texts with one model and store them in one index, one vector per text.
+
+    metadata, when given, holds the user metadata for each text; the text itself is always
+    stored under the same metadata key s3vectors-embed uses. A text whose vector could not be
+    stored gets the exception in place of its result; failing to embed the texts raises.
+    """
+    index = await _get_index(vector_bucket_name, index_name)
+    dimension = index['dimension']
+    embeddings = await embed_text_batch(
+        bedrock,
+        model_id,
+        texts,
+        dimension,
+        cache=embedding_cache,
+        # Unit length vectors do not change cosine distances; the CLI stores raw embeddings
+        normalize=index['distanceMetric'] == 'cosine',
+    )
+
+    vectors = [
+        {
+            'key': str(uuid.uuid4()),
+            'data': {'float32': embedding},
+            'metadata': {**(user_metadata or {}), EMBED_SRC_CONTENT_METADATA_KEY: text},
+        }
+        for text, embedding, user_metadata in zip(
+            texts, embeddings, metadata or itertools.repeat(None)
+        )
+    ]
+    errors = await asyncio.gather(
+        *(put_vectors_buffer.submit((vector_bucket_name, index_name), v) for v in vectors),
+        return_exceptions=True,
+    )
+
+    return [
+        {
+            'key': vector['key'],
+            'bucket': vector_bucket_name,
+            'index': index_name,
+            'model': model_id,
+            'contentType': 'text',
+            'embeddingDimensions': dimension,
+            'metadata': vector['metadata'],
+        }
+        if error is None
+        else error
+        for vector, error in zip(vectors, errors)
+    ]
+
+
+async def _embed_and_store_text_batch(key, texts):
+    """Embed a batch of texts for one (bucket, index, model) and store them."""
+    return await _embed_and_store_texts(*key, texts)
+
+
+# Coalesces concurrent embed_and_store_text calls into batched Bedrock and PutVectors requests
+text_batcher = MicroBatcher(_embed_and_store_text_batch, *get_embed_batch_settings())
 
 
 @mcp.tool()
 async def embed_and_store_text(embed_and_store_text_request: EmbedAndStoreTextRequest):
-    """Generate embeddings from text input using Bedrock models using s3vectors-embed-cli.
+    """Generate embeddings from text input using Bedrock models and store them in an S3 vector index.
+
+    Concurrent calls for the same bucket, index and model are embedded and stored together.
+    The result has the same shape as the output of:
 
-    Example usage:
     s3vectors-embed put \
     --vector-bucket-name my-bucket \
     --index-name my-index \
     --model-id amazon.titan-embed-text-v2:0 \
     --text-value "Hello, world!".
     """
-    args = [
-        '--vector-bucket-name',
-        embed_and_store_text_request.vectorBucketName,
-        '--index-name',
-        embed_and_store_text_request.indexName,
-        '--model-id',
-        embed_and_store_text_request.modelId,
-        '--text-value',
+    logger.info('tool-name: embed_and_store_text')
+
+    return await text_batcher.submit(
+        (
+            embed_and_store_text_request.vectorBucketName,
+            embed_and_store_text_request.indexName,
+            embed_and_store_text_request.modelId,
+        ),
         embed_and_store_text_request.textValue,
-    ]
+    )
 
-    command = ['s3vectors-embed'] + S3_VECTORS_GLOBAL_CONFIG + ['put'] + args
 
-    response = subprocess.run(command, capture_output=True)
+@mcp.tool()
+async def embed_and_store_texts_batch(
+    embed_and_store_texts_batch_request: EmbedAndStoreTextsBatchRequest,
+):
+    """Generate embeddings for many texts using Bedrock models and store them in an S3 vector index.
 
-    return eval(response.stdout)
+    Texts are embedded with as few Bedrock requests as the model allows (up to 96 texts per
+    request for Cohere models, concurrent requests for Titan models) and stored with batched
+    PutVectors requests. The result has one entry per text, in order, each with the same shape
+    as the result of embed_and_store_text. A text whose vector could not be stored gets
+    {'error': 'message'} instead; the other texts are stored regardless.
+    """
+    logger.info('tool-name: embed_and_store_texts_batch')
+
+    metadata = embed_and_store_texts_batch_request.metadata
+    metadata_columns = embed_and_store_texts_batch_request.metadataColumns
+    if metadata_columns:
+        # PutVectors takes one metadata dict per vector
+        keys = tuple(metadata_columns)
+        metadata = [dict(zip(keys, values)) for values in zip(*metadata_columns.values())]
+
+    results = await _embed_and_store_texts(
+        embed_and_store_texts_batch_request.vectorBucketName,
+        embed_and_store_texts_batch_request.indexName,
+        embed_and_store_texts_batch_request.modelId,
+        embed_and_store_texts_batch_request.textValues,
+        metadata,
+    )
+    return [
+        {'error': str(result)} if isinstance(result, BaseException) else result
+        for result in results
+    ]
 
 
 @mcp.tool()
@@ -283,7 +618,7 @@ async def embed_and_store_file(embed_and_store_file_request: EmbedAndStoreFileRe
     --model-id amazon.titan-embed-text-v2:0 \
     --text "./documents/*.txt"
     """
-    args = [
+    args = (
         '--vector-bucket-name',
         embed_and_store_file_request.vectorBucketName,
         '--index-name',
@@ -291,17 +626,17 @@ async def embed_and_store_file(embed_and_store_file_request: EmbedAndStoreFileRe
         '--model-id',
         embed_and_store_file_request.modelId,
         f'--{embed_and_store_file_request.modality}',
-        f'{embed_and_store_file_request.file}',
-    ]
-
-    command = ['s3vectors-embed'] + S3_VECTORS_GLOBAL_CONFIG + ['put'] + args
+        embed_and_store_file_request.file,
+    )
 
-    response = subprocess.run(command, capture_output=True)
+    stdout = await run_s3vectors_embed(
+        S3_VECTORS_PUT_COMMAND, (*args, *S3_VECTORS_PUT_OPTIONAL_CONFIG)
+    )
+    _index_written(
+        embed_and_store_file_request.vectorBucketName, embed_and_store_file_request.indexName
+    )
 
-    try:
-        return eval(response.stdout)  # works well for single-file and raw text value embedding
-    except SyntaxError:
-        return str(response.stdout.decode())  # works well for wildcard embedding tasks
+    return parse_s3vectors_cli_batch_output(stdout)
 
 
 @mcp.tool()
@@ -326,7 +661,7 @@ async def embed_and_store_s3_objects(
     --model-id amazon.titan-embed-text-v2:0 \
     --text "s3://my-bucket/sample.txt"
     """
-    args = [
+    args = (
         '--vector-bucket-name',
         embed_and_store_s3_objects_request.vectorBucketName,
         '--index-name',
@@ -335,18 +670,251 @@ async def embed_and_store_s3_objects(
         embed_and_store_s3_objects_request.modelId,
         f'--{embed_and_store_s3_objects_request.modality}',
         embed_and_store_s3_objects_request.s3_path,
-    ]
-
-    command = ['s3vectors-embed'] + S3_VECTORS_GLOBAL_CONFIG + ['put'] + args
+    )
 
-    response = subprocess.run(command, capture_output=True)
+    stdout = await run_s3vectors_embed(
+        S3_VECTORS_PUT_COMMAND, (*args, *S3_VECTORS_PUT_OPTIONAL_CONFIG)
+    )
+    _index_written(
+        embed_and_store_s3_objects_request.vectorBucketName,
+        embed_and_store_s3_objects_request.indexName,
+    )
 
-    return response.stdout.decode()
+    return parse_s3vectors_cli_batch_output(stdout)
 
 
 ###### S3 Vector Query Tools
 
 
+def _local_index_path(vector_bucket_name: str, index_name: str) -> Optional[str]:
+    """Path (without suffix) that the local copy of an index is persisted at, if any."""
+    if LOCAL_INDEX_DIR is None:
+        return None
+    return os.path.join(LOCAL_INDEX_DIR, f'{vector_bucket_name}__{index_name}')
+
+
+def _get_local_index(vector_bucket_name: str, index_name: str) -> Optional[LocalIndex]:
+    """Get the local copy of an index, loading a persisted one on first use."""
+    key = (vector_bucket_name, index_name)
+    local_index = local_indexes.get(key)
+    if local_index is None:
+        path = _local_index_path(vector_bucket_name, index_name)
+        local_index = LocalIndex.load(path) if path else None
+        if local_index is not None:
+            local_indexes[key] = local_index
+    return local_index
+
+
+def _index_written(vector_bucket_name: str, index_name: str) -> None:
+    """Forget cached query results and the local copy of an index after writing vectors to it."""
+    key = (vector_bucket_name, index_name)
+    index_writes[key] = index_writes.get(key, 0) + 1
+    query_cache.clear()
+    semantic_query_cache.clear()
+
+    local_indexes.pop(key, None)
+    path = _local_index_path(vector_bucket_name, index_name)
+    if path:
+        LocalIndex.remove(path)
+
+
+@mcp.tool()
+async def warm_local_index(warm_local_index_request: WarmLocalIndexRequest):
+    """Copy every vector of an index into a local snapshot that embed_and_query searches instead of S3 Vectors.
+
+    Text queries without a filter are then answered in-process by an exact search of the
+    snapshot, with the same results format. The snapshot is dropped when vectors are written to
+    the index through this server; call this tool again to pick up other changes. When
+    S3VECTORS_LOCAL_INDEX_DIR is set, the snapshot is also persisted there and reused after a
+    restart.
+
+    Note: You must have the s3vectors:GetIndex, s3vectors:ListVectors and s3vectors:GetVectors
+    permissions to use this operation.
+
+    Returns:
+        Result:
+            {
+                'vectorBucketName': 'string',
+                'indexName': 'string',
+                'vectorCount': 123,
+                'dimension': 123,
+                'distanceMetric': 'euclidean'|'cosine'
+            }
+    """
+    logger.info('tool-name: warm_local_index')
+
+    vector_bucket_name = warm_local_index_request.vectorBucketName
+    index_name = warm_local_index_request.indexName
+    index = await _get_index(vector_bucket_name, index_name)
+
+    vectors = []
+    async for page in _iter_pages(
+        'list_vectors',
+        {
+            'vectorBucketName': vector_bucket_name,
+            'indexName': index_name,
+            'returnData': True,
+            'returnMetadata': True,
+        },
+    ):
+        vectors.extend(page['vectors'])
+
+    local_index = await asyncio.to_thread(
+        LocalIndex.from_list_vectors, vectors, index['dimension'], index['distanceMetric']
+    )
+    path = _local_index_path(vector_bucket_name, index_name)
+    if path:
+        await asyncio.to_thread(local_index.save, path)
+    local_indexes[(vector_bucket_name, index_name)] = local_index
+
+    return {
+        'vectorBucketName': vector_bucket_name,
+        'indexName': index_name,
+        'vectorCount': len(local_index),
+        'dimension': local_index.dimension,
+        'distanceMetric': local_index.distance_metric,
+    }
+
+
+def _is_text_query(query_input: str) -> bool:
+    """Whether s3vectors-embed treats query_input as raw text rather than a file or S3 object."""
+    return not query_input.startswith('s3://') and not os.path.isfile(query_input)
+
+
+def _can_query_directly(embed_and_query_text_request: EmbedAndQueryTextRequest) -> bool:
+    """Whether the query can be embedded and run in-process instead of by s3vectors-embed."""
+    return (
+        embed_and_query_text_request.output == 'json'
+        and embed_and_query_text_request.modelId in DIRECT_QUERY_EMBEDDING_MODELS
+        and _is_text_query(embed_and_query_text_request.queryInput)
+    )
+
+
+async def _embed_query_texts(
+    vector_bucket_name: str, index_name: str, model_id: str, query_texts: List[str]
+):
+    """Embed query texts for one index and model the way s3vectors-embed query does."""
+    index = await _get_index(vector_bucket_name, index_name)
+    return await embed_text_batch(
+        bedrock,
+        model_id,
+        query_texts,
+        index['dimension'],
+        'search_query',
+        cache=embedding_cache,
+        normalize=index['distanceMetric'] == 'cosine',
+    )
+
+
+def _query_s3_vectors(
+    embed_and_query_text_request: EmbedAndQueryTextRequest, query_embedding, top_k: int
+):
+    """Query an index in S3 Vectors with an embedded query and return the matching vectors."""
+    params = {
+        'vectorBucketName': embed_and_query_text_request.vectorBucketName,
+        'indexName': embed_and_query_text_request.indexName,
+        'queryVector': {'float32': query_embedding.tolist()},
+        'topK': top_k,
+        # s3vectors-embed query always returns metadata
+        'returnMetadata': True,
+        'returnDistance': bool(embed_and_query_text_request.returnDistance),
+    }
+    if embed_and_query_text_request.filter:
+        params['filter'] = embed_and_query_text_request.filter
+
+    return s3v.query_vectors(**params)['vectors']
+
+
+def _query_vectors(embed_and_query_text_request: EmbedAndQueryTextRequest, query_embedding):
+    """Query an index with an embedded query, formatting the results like s3vectors-embed query.
+
+    Queries without a filter are answered from the local copy of the index, if there is one.
+    """
+    top_k = int(embed_and_query_text_request.topK or 5)
+    local_index = None
+    if not embed_and_query_text_request.filter:
+        local_index = _get_local_index(
+            embed_and_query_text_request.vectorBucketName, embed_and_query_text_request.indexName
+        )
+
+    if local_index is not None:
+        vectors = local_index.query(query_embedding, top_k)
+    else:
+        vectors = _query_s3_vectors(embed_and_query_text_request, query_embedding, top_k)
+
+    results = []
+    for vector in vectors:
+        result = {'Key': vector.get('key', '')}
+        if embed_and_query_text_request.returnDistance:
+            result['distance'] = vector.get('distance', 0.0)
+        result['metadata'] = vector.get('metadata', {})
+        results.append(result)
+
+    return {
+        'results': results,
+        'summary': {
+            'queryType': 'text',
+            'model': embed_and_query_text_request.modelId,
+            'index': embed_and_query_text_request.indexName,
+            'resultsFound': len(results),
+            'queryDimensions': len(query_embedding),
+        },
+    }
+
+
+async def _query_with_embedding(
+    embed_and_query_text_request: EmbedAndQueryTextRequest, cache_key: str, query_embedding
+):
+    """Answer an embedded text query from the semantic cache or the index, caching the result."""
+    scope = None
+    if semantic_query_cache.enabled:
+        scope = embed_and_query_text_request.model_dump_json(exclude={'queryInput', 'bypassCache'})
+        if not embed_and_query_text_request.bypassCache:
+            cached = semantic_query_cache.get(scope, query_embedding)
+            if cached is not None:
+                query_cache.set(cache_key, cached)
+                return cached
+
+    index_key = (
+        embed_and_query_text_request.vectorBucketName,
+        embed_and_query_text_request.indexName,
+    )
+    writes = index_writes.get(index_key, 0)
+    result = await asyncio.to_thread(_query_vectors, embed_and_query_text_request, query_embedding)
+
+    # A write that finished during the query may or may not be reflected in the result
+    if index_writes.get(index_key, 0) == writes:
+        query_cache.set(cache_key, result)
+        if scope is not None:
+            semantic_query_cache.set(scope, query_embedding, result)
+
+    return result
+
+
+async def _query_with_s3vectors_embed(embed_and_query_text_request: EmbedAndQueryTextRequest):
+    """Run s3vectors-embed query for queries that are files, S3 objects or table output."""
+    s3_vectors_query_optional_config = get_s3vectors_query_optional_config(
+        embed_and_query_text_request
+    )
+
+    args = (
+        '--vector-bucket-name',
+        embed_and_query_text_request.vectorBucketName,
+        '--index-name',
+        embed_and_query_text_request.indexName,
+        '--model-id',
+        embed_and_query_text_request.modelId,
+        '--query-input',
+        embed_and_query_text_request.queryInput,
+    )
+
+    stdout = await run_s3vectors_embed(
+        S3_VECTORS_QUERY_COMMAND, (*args, *s3_vectors_query_optional_config)
+    )
+
+    return parse_s3vectors_cli_batch_output(stdout)
+
+
 @mcp.tool()
 async def embed_and_query(embed_and_query_text_request: EmbedAndQueryTextRequest):
     """Generate similar results from vectors stored under an S3 vector index using Bedrock models using s3vectors-embed-cli.
@@ -378,35 +946,90 @@ async def embed_and_query(embed_and_query_text_request: EmbedAndQueryTextRequest
         --query-input "s3://my-bucket/image.jpeg" \
         --k 3
     """
-    s3_vectors_query_optional_config = get_s3vectors_query_optional_config(
-        embed_and_query_text_request
-    )
-
-    args = [
-        '--vector-bucket-name',
+    cache_key = embed_and_query_text_request.model_dump_json(exclude={'bypassCache'})
+    if not embed_and_query_text_request.bypassCache:
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if not _can_query_directly(embed_and_query_text_request):
+        index_key = (
+            embed_and_query_text_request.vectorBucketName,
+            embed_and_query_text_request.indexName,
+        )
+        writes = index_writes.get(index_key, 0)
+        result = await _query_with_s3vectors_embed(embed_and_query_text_request)
+        if result and index_writes.get(index_key, 0) == writes:
+            query_cache.set(cache_key, result)
+        return result
+
+    (query_embedding,) = await _embed_query_texts(
         embed_and_query_text_request.vectorBucketName,
-        '--index-name',
         embed_and_query_text_request.indexName,
-        '--model-id',
         embed_and_query_text_request.modelId,
-        '--query-input',
-        embed_and_query_text_request.queryInput,
-    ]
-
-    response = subprocess.run(
-        ['s3vectors-embed']
-        + S3_VECTORS_GLOBAL_CONFIG
-        + ['query']
-        + args
-        + s3_vectors_query_optional_config,
-        capture_output=True,
+        [embed_and_query_text_request.queryInput],
     )
+    return await _query_with_embedding(embed_and_query_text_request, cache_key, query_embedding)
+
 
-    return response.stdout.decode()
+@mcp.tool()
+async def embed_and_query_batch(embed_and_query_batch_request: EmbedAndQueryBatchRequest):
+    """Run several embed_and_query requests together and return their results in order.
+
+    Text queries for the same bucket, index and model are embedded together, with as few
+    Bedrock requests as the model allows, and all the vector queries run concurrently. Each
+    result is the same as the result of embed_and_query for that request.
+    """
+    logger.info('tool-name: embed_and_query_batch')
+
+    queries = embed_and_query_batch_request.queries
+    results: List[Any] = [None] * len(queries)
+    cache_keys = [query.model_dump_json(exclude={'bypassCache'}) for query in queries]
+
+    # Positions of the uncached queries that can be embedded here, by (bucket, index, model)
+    direct_groups: Dict[Tuple[str, str, str], List[int]] = {}
+    other_positions = []
+    for position, query in enumerate(queries):
+        if not query.bypassCache:
+            cached = query_cache.get(cache_keys[position])
+            if cached is not None:
+                results[position] = cached
+                continue
+        if _can_query_directly(query):
+            group_key = (query.vectorBucketName, query.indexName, query.modelId)
+            direct_groups.setdefault(group_key, []).append(position)
+        else:
+            other_positions.append(position)
+
+    async def run_direct_group(group_key, positions):
+        query_embeddings = await _embed_query_texts(
+            *group_key, [queries[position].queryInput for position in positions]
+        )
+        group_results = await asyncio.gather(
+            *(
+                _query_with_embedding(queries[position], cache_keys[position], query_embedding)
+                for position, query_embedding in zip(positions, query_embeddings)
+            )
+        )
+        for position, result in zip(positions, group_results):
+            results[position] = result
+
+    async def run_other(position):
+        results[position] = await embed_and_query(queries[position])
+
+    await asyncio.gather(
+        *(run_direct_group(key, positions) for key, positions in direct_groups.items()),
+        *(run_other(position) for position in other_positions),
+    )
+    return results
 
 
 def main():
     """Run the S3 Vectors MCP server."""
+    # Configure Loguru logging here, where the server owns the process, not on import; records
+    # below the level are dropped before any formatting, so per-tool info logs cost next to nothing
+    logger.remove()
+    logger.add(sys.stderr, level=os.getenv('FASTMCP_LOG_LEVEL', 'WARNING'))
     logger.info('Starting S3 Vectors MCP server.')
 
     mcp.run(transport='stdio')
@@ -1,4 +1,11 @@
-def process_stdout_results(stdout_string: str):
-    """Parse out dictionary from stdout results from s3vector-embed-cli commands."""
-    idx = stdout_string.find('{')
-    return eval(stdout_string[idx:])
+from awslabs.s3_vectors_mcp_server.helpers import parse_s3vectors_cli_batch_output
+
+
+def process_stdout_results(stdout_results):
+    """Parse out the results of s3vector-embed-cli commands, as dicts or lists of dicts."""
+    if isinstance(stdout_results, str):
+        stdout_results = stdout_results.encode()
+    if isinstance(stdout_results, bytes):
+        return parse_s3vectors_cli_batch_output(stdout_results)
+    # Tools return CLI output that is JSON already parsed
+    return stdout_results
@@ -0,0 +1,231 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the embedding helpers of the S3 Vectors MCP server."""
+
+import asyncio
+import io
+import json
+import numpy as np
+import pytest
+from awslabs.s3_vectors_mcp_server.embeddings import (
+    EmbeddingCache,
+    MicroBatcher,
+    embed_text_batch,
+    embed_texts,
+)
+from botocore.exceptions import ClientError
+
+
+class _BedrockRuntime:
+    """Records InvokeModel bodies and answers with one embedding per text."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        body = json.loads(body)
+        self.bodies.append(body)
+        if 'texts' in body:
+            response = {'embeddings': [[0.5] for _ in body['texts']]}
+        else:
+            response = {'embedding': [0.5]}
+        return {'body': io.BytesIO(json.dumps(response).encode())}
+
+
+@pytest.mark.parametrize(
+    'model_id, texts, body',
+    [
+        (
+            'amazon.titan-embed-text-v2:0',
+            ['hello'],
+            {'inputText': 'hello', 'dimensions': 256},
+        ),
+        (
+            'amazon.titan-embed-image-v1',
+            ['hello'],
+            {'inputText': 'hello', 'embeddingConfig': {'outputEmbeddingLength': 256}},
+        ),
+        (
+            'cohere.embed-english-v3',
+            ['hello', 'world'],
+            {'texts': ['hello', 'world'], 'input_type': 'search_query'},
+        ),
+    ],
+)
+def test_embed_texts_request_body(model_id, texts, body):
+    """Test that each model gets the request body s3vectors-embed sends for it."""
+    bedrock_runtime = _BedrockRuntime()
+
+    embeddings = embed_texts(bedrock_runtime, model_id, texts, 256, 'search_query')
+
+    assert bedrock_runtime.bodies == [body]
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[0.5]] * len(texts)
+
+
+@pytest.mark.parametrize('model_id', ['amazon.titan-embed-text-v2:0', 'cohere.embed-english-v3'])
+async def test_embed_text_batch_embeds_each_distinct_text_once(model_id):
+    """Test that repeated texts are embedded once and every text still gets its embedding."""
+    bedrock_runtime = _BedrockRuntime()
+
+    embeddings = await embed_text_batch(bedrock_runtime, model_id, ['a', 'b', 'a', 'a'], 256)
+
+    embedded = [
+        text
+        for body in bedrock_runtime.bodies
+        for text in body.get('texts', [body.get('inputText')])
+    ]
+    assert sorted(embedded) == ['a', 'b']
+    assert embeddings.tolist() == [[0.5]] * 4
+
+
+async def test_embedding_cache_persists_embeddings(tmp_path):
+    """Test that cached texts are not embedded again, also after the cache is reopened."""
+    path = str(tmp_path / 'cache' / 'embeddings')
+    model_id = 'amazon.titan-embed-text-v2:0'
+    bedrock_runtime = _BedrockRuntime()
+
+    cache = EmbeddingCache(path)
+    await embed_text_batch(bedrock_runtime, model_id, ['a', 'b'], 256, cache=cache)
+    cache.close()
+
+    cache = EmbeddingCache(path)
+    embeddings = await embed_text_batch(
+        bedrock_runtime, model_id, ['a', 'c', 'b'], 256, cache=cache
+    )
+    other_dimension = await embed_text_batch(bedrock_runtime, model_id, ['a'], 512, cache=cache)
+    cache.close()
+
+    # 'a' and 'b' once for 256 dimensions, then only 'c', and 'a' again for 512 dimensions
+    assert sorted(body['inputText'] for body in bedrock_runtime.bodies) == ['a', 'a', 'b', 'c']
+    assert embeddings.tolist() == [[0.5]] * 3
+    assert other_dimension.tolist() == [[0.5]]
+
+
+async def test_embed_text_batch_returns_unit_vectors():
+    """Test that embeddings are scaled to unit length only when asked to."""
+    bedrock_runtime = _BedrockRuntime()
+    raw = {'a': [3.0, 4.0], 'b': [-0.1, 0.2], 'c': [0.0, 0.0]}
+    bedrock_runtime.invoke_model = lambda modelId, body, **kwargs: {
+        'body': io.BytesIO(
+            json.dumps({'embeddings': [raw[text] for text in json.loads(body)['texts']]}).encode()
+        )
+    }
+
+    embeddings = await embed_text_batch(
+        bedrock_runtime, 'cohere.embed-english-v3', ['a', 'b', 'c'], 2, normalize=True
+    )
+    raw_embeddings = await embed_text_batch(
+        bedrock_runtime, 'cohere.embed-english-v3', ['a', 'b', 'c'], 2
+    )
+
+    for v in embeddings[:2]:
+        assert abs(np.linalg.norm(v) - 1) < 1e-5
+    assert embeddings[0].tolist() == pytest.approx([0.6, 0.8])
+    assert embeddings[2].tolist() == [0.0, 0.0]
+    assert raw_embeddings.tolist() == [[3.0, 4.0], pytest.approx([-0.1, 0.2]), [0.0, 0.0]]
+
+
+async def test_micro_batcher_groups_concurrent_submissions_by_key():
+    """Test that concurrent submissions are batched per key and get their own results."""
+    batches = []
+
+    async def process_batch(key, items):
+        batches.append((key, items))
+        return [f'{key}:{item}' for item in items]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=3, max_wait=0.01)
+
+    results = await asyncio.gather(
+        *(batcher.submit('a', i) for i in range(4)), batcher.submit('b', 'x')
+    )
+
+    assert results == ['a:0', 'a:1', 'a:2', 'a:3', 'b:x']
+    assert sorted(batches) == [('a', [0, 1, 2]), ('a', [3]), ('b', ['x'])]
+
+
+async def test_micro_batcher_isolates_failing_items():
+    """Test that a failing batch is retried item by item, so only the bad item fails."""
+    batches = []
+
+    async def process_batch(key, items):
+        batches.append(items)
+        if 'bad' in items:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'bad'}}, 'PutVectors'
+            )
+        return [ValueError(item) if item == 'invalid' else item.upper() for item in items]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=10, max_wait=0.01)
+
+    results = await asyncio.gather(
+        *(batcher.submit('a', item) for item in ['x', 'bad', 'invalid', 'y']),
+        return_exceptions=True,
+    )
+
+    assert [result if isinstance(result, str) else type(result) for result in results] == [
+        'X',
+        ClientError,
+        ValueError,
+        'Y',
+    ]
+    assert batches[0] == ['x', 'bad', 'invalid', 'y']
+    assert sorted(map(tuple, batches[1:])) == [('bad',), ('invalid',), ('x',), ('y',)]
+
+
+@pytest.mark.parametrize(
+    'error',
+    [
+        ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'slow'}}, 'PutVectors'),
+        RuntimeError('connection reset'),
+    ],
+)
+async def test_micro_batcher_fails_whole_batch_on_request_errors(error):
+    """Test that errors not caused by the items fail the batch without per-item retries."""
+    batches = []
+
+    async def process_batch(key, items):
+        batches.append(items)
+        raise error
+
+    batcher = MicroBatcher(process_batch, max_batch_size=10, max_wait=0.01)
+
+    results = await asyncio.gather(
+        *(batcher.submit('a', item) for item in ['x', 'y', 'z']), return_exceptions=True
+    )
+
+    assert results == [error] * 3
+    assert batches == [['x', 'y', 'z']]
+
+
+async def test_micro_batcher_cancels_submissions_when_processing_is_cancelled():
+    """Test that cancelling a batch cancels its submissions instead of leaving them pending."""
+    started = asyncio.Event()
+
+    async def process_batch(key, items):
+        started.set()
+        await asyncio.sleep(3600)
+
+    batcher = MicroBatcher(process_batch, max_batch_size=10, max_wait=0.01)
+    submissions = asyncio.gather(
+        batcher.submit('a', 1), batcher.submit('a', 2), return_exceptions=True
+    )
+
+    await started.wait()
+    for task in list(batcher._tasks):
+        task.cancel()
+    results = await asyncio.wait_for(submissions, timeout=1)
+
+    assert [type(result) for result in results] == [asyncio.CancelledError] * 2
@@ -0,0 +1,371 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the helper functions of the S3 Vectors MCP server."""
+
+import asyncio
+import base64
+import click
+import numpy as np
+import pytest
+import sys
+import time
+import types
+from awslabs.s3_vectors_mcp_server import helpers
+from awslabs.s3_vectors_mcp_server.helpers import (
+    LoopSemaphore,
+    TTLCache,
+    encode_vectors_data_base64,
+    get_put_vectors_batch_settings,
+    get_s3_vectors_client,
+    get_s3vectors_cli_global_config,
+    get_s3vectors_put_optional_config,
+    get_s3vectors_query_optional_config,
+    parse_s3vectors_cli_batch_output,
+    parse_s3vectors_cli_output,
+    run_s3vectors_cli,
+    run_s3vectors_embed,
+)
+from awslabs.s3_vectors_mcp_server.models import EmbedAndQueryTextRequest
+
+
+def test_s3_vectors_client_is_cached_per_region(monkeypatch):
+    """Test that clients are reused for the same region and rebuilt for a different one."""
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    east = get_s3_vectors_client()
+
+    assert get_s3_vectors_client() is east
+
+    monkeypatch.setenv('AWS_REGION', 'us-west-2')
+    west = get_s3_vectors_client()
+
+    assert west is not east
+    assert west.meta.region_name == 'us-west-2'
+
+
+def test_s3_vectors_client_config(monkeypatch):
+    """Test that the client is configured for concurrent use."""
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    monkeypatch.delenv('S3VECTORS_AWS_MAX_POOL_CONNECTIONS', raising=False)
+    config = get_s3_vectors_client().meta.config
+
+    assert config.max_pool_connections == 64
+    assert config.tcp_keepalive is True
+    assert config.retries['mode'] == 'adaptive'
+
+    monkeypatch.setenv('S3VECTORS_AWS_MAX_POOL_CONNECTIONS', '128')
+    client = get_s3_vectors_client()
+
+    assert client.meta.config.max_pool_connections == 128
+    assert client._endpoint.http_session._manager.connection_pool_kw['maxsize'] == 128
+
+
+def test_cli_global_config_is_rebuilt_per_call(monkeypatch):
+    """Test that repeated calls return the same global config instead of accumulating it."""
+    monkeypatch.setenv('AWS_REGION', 'us-west-2')
+    monkeypatch.setenv('AWS_PROFILE', 'my-profile')
+    monkeypatch.delenv('DEBUG_FLAG', raising=False)
+
+    first = get_s3vectors_cli_global_config()
+    second = get_s3vectors_cli_global_config()
+
+    assert first == ('--profile', 'my-profile', '--region', 'us-west-2')
+    assert second == first
+
+
+def test_query_optional_config_is_rebuilt_per_call():
+    """Test that query options reflect only the request they were built from."""
+    request = EmbedAndQueryTextRequest(
+        vectorBucketName='my-bucket',
+        indexName='my-index',
+        queryInput='hello world',
+        topK='3',
+        filter={'genre': 'scifi'},
+        returnDistance=True,
+    )
+
+    first = get_s3vectors_query_optional_config(request)
+    second = get_s3vectors_query_optional_config(request)
+
+    assert list(first) == [
+        '--k',
+        '3',
+        '--filter',
+        '{"genre": "scifi"}',
+        '--return-distance',
+        '--output',
+        'json',
+    ]
+    assert list(second) == list(first)
+
+
+@pytest.mark.parametrize(
+    'stdout',
+    [
+        b'{"key": "abc", "bucket": "my-bucket", "embeddingDimensions": 1024, "ok": true}',
+        b"{'key': 'abc', 'bucket': 'my-bucket', 'embeddingDimensions': 1024, 'ok': True}",
+    ],
+)
+def test_parse_s3vectors_cli_output(stdout):
+    """Test that CLI output is parsed from either JSON or a Python dict repr."""
+    assert parse_s3vectors_cli_output(stdout) == {
+        'key': 'abc',
+        'bucket': 'my-bucket',
+        'embeddingDimensions': 1024,
+        'ok': True,
+    }
+
+
+def test_parse_s3vectors_cli_output_does_not_execute_code():
+    """Test that CLI output is never evaluated as code."""
+    with pytest.raises(ValueError):
+        parse_s3vectors_cli_output(b"__import__('os').getcwd()")
+
+    with pytest.raises(SyntaxError):
+        parse_s3vectors_cli_output(b'Processed 3 files\nDone.')
+
+
+@pytest.mark.parametrize(
+    'stdout, expected',
+    [
+        (
+            b'Starting streaming batch processing: s3://b/*\n{\n  "processedFiles": 2\n}\n'
+            b'Note: Showing first 10 of 12 vector keys\n',
+            {'processedFiles': 2},
+        ),
+        (b'{"key": "a"}\n{"key": "b"}\n', [{'key': 'a'}, {'key': 'b'}]),
+        (b'Done.\n\xff', 'Done.\n\ufffd'),
+    ],
+)
+def test_parse_s3vectors_cli_batch_output(stdout, expected):
+    """Test that wildcard put output is parsed into its JSON documents, or kept as text."""
+    assert parse_s3vectors_cli_batch_output(stdout) == expected
+
+
+async def test_run_s3vectors_cli_runs_commands_concurrently():
+    """Test that CLI commands return their stdout and do not block each other."""
+    command = [sys.executable, '-c', 'import time; time.sleep(0.5); print(\'{"ok": true}\')']
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_s3vectors_cli(command) for _ in range(4)))
+    elapsed = time.perf_counter() - start
+
+    assert [parse_s3vectors_cli_output(stdout) for stdout in results] == [{'ok': True}] * 4
+    assert elapsed < 1.5
+
+
+async def test_run_s3vectors_cli_raises_on_failure():
+    """Test that a command exiting with a non-zero code raises with its stderr."""
+    command = [sys.executable, '-c', 'import sys; print("partial"); sys.exit("Access denied")']
+
+    with pytest.raises(RuntimeError, match='exited with code 1: Access denied'):
+        await run_s3vectors_cli(command)
+
+
+@click.command()
+@click.option('--text')
+@click.option('--fail', type=click.Choice(['raise', 'exit', 'exit0']))
+@click.pass_context
+def _stub_embed_put(ctx, text, fail):
+    """Stand-in for s3vectors-embed put that prints the way the CLI does."""
+    ctx.obj['console'].print('{"key": "%s"}' % text)
+    print('Processed 1 file')
+    if fail == 'raise':
+        raise click.ClickException('Index not found')
+    if fail == 'exit':
+        sys.exit(2)
+    if fail == 'exit0':
+        sys.exit(0)
+
+
+@pytest.fixture
+def stub_s3vectors_embed(monkeypatch):
+    """Make a stub put command importable from the s3vectors-embed-cli module path."""
+    commands = types.ModuleType('s3vectors.commands')
+    for name, command in (('embed_put', _stub_embed_put), ('embed_query', _stub_embed_put)):
+        module = types.ModuleType(f's3vectors.commands.{name}')
+        setattr(module, name, command)
+        setattr(commands, name, module)
+        monkeypatch.setitem(sys.modules, f's3vectors.commands.{name}', module)
+    monkeypatch.setitem(sys.modules, 's3vectors', types.ModuleType('s3vectors'))
+    monkeypatch.setitem(sys.modules, 's3vectors.commands', commands)
+    helpers._get_s3vectors_embed_command.cache_clear()
+    yield
+    helpers._get_s3vectors_embed_command.cache_clear()
+
+
+async def test_run_s3vectors_embed_in_process_captures_output(stub_s3vectors_embed):
+    """Test that an importable command runs in-process with its console and prints captured."""
+    stdout = sys.stdout
+
+    output = await run_s3vectors_embed(
+        ('s3vectors-embed', '--region', 'us-east-1', 'put'), ('--text', 'hello')
+    )
+
+    assert output == b'{"key": "hello"}\nProcessed 1 file\n'
+    assert sys.stdout is stdout
+
+
+@pytest.mark.parametrize(
+    'fail, message',
+    [('raise', 'Index not found'), ('exit', '2')],
+)
+async def test_run_s3vectors_embed_in_process_raises_on_failure(
+    stub_s3vectors_embed, fail, message
+):
+    """Test that a failing in-process command raises with the output it printed."""
+    stdout = sys.stdout
+
+    with pytest.raises(RuntimeError) as excinfo:
+        await run_s3vectors_embed(
+            ('s3vectors-embed', '--region', 'us-east-1', 'put'), ('--text', 'a', '--fail', fail)
+        )
+
+    assert str(excinfo.value) == (
+        f's3vectors-embed failed: {message}\n{{"key": "a"}}\nProcessed 1 file'
+    )
+    assert sys.stdout is stdout
+
+
+async def test_run_s3vectors_embed_in_process_exit_zero_succeeds(stub_s3vectors_embed):
+    """Test that a command calling sys.exit(0) returns its output."""
+    output = await run_s3vectors_embed(
+        ('s3vectors-embed', '--region', 'us-east-1', 'put'), ('--text', 'a', '--fail', 'exit0')
+    )
+
+    assert output == b'{"key": "a"}\nProcessed 1 file\n'
+
+
+async def test_run_s3vectors_embed_falls_back_to_executable(monkeypatch):
+    """Test that the executable is run when s3vectors-embed-cli cannot be imported."""
+    monkeypatch.setitem(sys.modules, 's3vectors.commands.embed_put', None)
+    helpers._get_s3vectors_embed_command.cache_clear()
+    commands = []
+
+    async def fake_run_s3vectors_cli(command):
+        commands.append(command)
+        return b'{"ok": true}'
+
+    monkeypatch.setattr(helpers, 'run_s3vectors_cli', fake_run_s3vectors_cli)
+    try:
+        output = await run_s3vectors_embed(
+            ('s3vectors-embed', '--region', 'us-east-1', 'put'), ('--text', 'a')
+        )
+    finally:
+        helpers._get_s3vectors_embed_command.cache_clear()
+
+    assert output == b'{"ok": true}'
+    assert commands == [('s3vectors-embed', '--region', 'us-east-1', 'put', '--text', 'a')]
+
+
+def test_loop_semaphore_works_across_event_loops():
+    """Test that a semaphore contended in one event loop still works in the next one."""
+    semaphore = LoopSemaphore(1)
+
+    async def contend():
+        running = []
+        peak = []
+
+        async def hold():
+            async with semaphore:
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        await asyncio.gather(*(hold() for _ in range(3)))
+        return max(peak)
+
+    assert asyncio.run(contend()) == 1
+    assert asyncio.run(contend()) == 1
+
+
+def test_ttl_cache_expires_and_clears(monkeypatch):
+    """Test that cached values are reused until they expire or the cache is cleared."""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def factory():
+        calls.append(now[0])
+        return len(calls)
+
+    assert cache.get_or_set('key', factory) == 1
+    assert cache.get_or_set('key', factory) == 1
+
+    now[0] += 61
+    assert cache.get_or_set('key', factory) == 2
+
+    cache.clear()
+    assert cache.get_or_set('key', factory) == 3
+
+
+def test_ttl_cache_disabled():
+    """Test that a TTL of 0 disables caching."""
+    cache = TTLCache(ttl=0)
+    values = iter(range(3))
+
+    assert [cache.get_or_set('key', lambda: next(values)) for _ in range(3)] == [0, 1, 2]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that a full cache evicts the entry that was used least recently."""
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+
+def test_put_vectors_batch_settings(monkeypatch):
+    """Test that PutVectors batching defaults to the API limit and clamps overrides to it."""
+    monkeypatch.delenv('S3VECTORS_PUT_VECTORS_BATCH_SIZE', raising=False)
+    monkeypatch.delenv('S3VECTORS_PUT_VECTORS_BATCH_MAX_WAIT_MS', raising=False)
+
+    assert get_put_vectors_batch_settings() == (500, 0.05)
+
+    monkeypatch.setenv('S3VECTORS_PUT_VECTORS_BATCH_SIZE', '1000')
+    monkeypatch.setenv('S3VECTORS_PUT_VECTORS_BATCH_MAX_WAIT_MS', '10')
+
+    assert get_put_vectors_batch_settings() == (500, 0.01)
+
+
+def test_encode_vectors_data_base64():
+    """Test that vector data is replaced by base64 float32 that numpy decodes losslessly."""
+    vectors = [{'key': 'v1', 'data': {'float32': [0.5, -1.25, 3.0]}}, {'key': 'v2'}]
+
+    encode_vectors_data_base64(vectors)
+
+    decoded = np.frombuffer(base64.b64decode(vectors[0]['data']['float32_base64']), dtype='<f4')
+    assert decoded.tolist() == [0.5, -1.25, 3.0]
+    assert vectors[1] == {'key': 'v2'}
+
+
+def test_put_optional_config(monkeypatch):
+    """Test that put commands fetch and embed wildcard inputs with the configured workers."""
+    monkeypatch.delenv('S3VECTORS_EMBED_MAX_WORKERS', raising=False)
+
+    assert get_s3vectors_put_optional_config() == ('--max-workers', '16')
+
+    monkeypatch.setenv('S3VECTORS_EMBED_MAX_WORKERS', '0')
+
+    assert get_s3vectors_put_optional_config() == ('--max-workers', '1')
@@ -0,0 +1,125 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the local index copies of the S3 Vectors MCP server."""
+
+import numpy as np
+import pytest
+from awslabs.s3_vectors_mcp_server.local_index import LocalIndex
+
+
+LIST_VECTORS = [
+    {'key': 'x', 'data': {'float32': [2.0, 0.0]}, 'metadata': {'axis': 'x'}},
+    {'key': 'y', 'data': {'float32': [0.0, 1.0]}, 'metadata': {'axis': 'y'}},
+    {'key': 'xy', 'data': {'float32': [3.0, 3.0]}},
+]
+
+
+def test_cosine_query_ranks_by_angle():
+    """Test that cosine queries ignore vector length and return cosine distances."""
+    local_index = LocalIndex.from_list_vectors(LIST_VECTORS, 2)
+
+    results = local_index.query([1.0, 0.1], top_k=2)
+
+    assert [result['key'] for result in results] == ['x', 'xy']
+    assert results[0]['metadata'] == {'axis': 'x'}
+    assert results[0]['distance'] == pytest.approx(1 - 1 / np.hypot(1.0, 0.1), abs=1e-6)
+    assert results[1]['distance'] == pytest.approx(
+        1 - 1.1 / np.hypot(1.0, 0.1) / np.sqrt(2), abs=1e-6
+    )
+
+
+def test_euclidean_query_ranks_by_distance():
+    """Test that euclidean queries return the nearest vectors and their distances."""
+    local_index = LocalIndex.from_list_vectors(LIST_VECTORS, 2, 'euclidean')
+
+    results = local_index.query([0.0, 0.5], top_k=5)
+
+    assert [result['key'] for result in results] == ['y', 'x', 'xy']
+    assert [result['distance'] for result in results] == pytest.approx(
+        [0.5, np.hypot(2.0, 0.5), np.hypot(3.0, 2.5)]
+    )
+    assert results[2]['metadata'] == {}
+
+
+def test_save_and_load(tmp_path):
+    """Test that a saved index is memory-mapped with the same results, and is gone once removed."""
+    path = str(tmp_path / 'cache' / 'my-bucket__my-index')
+    local_index = LocalIndex.from_list_vectors(LIST_VECTORS, 2, 'euclidean')
+
+    assert LocalIndex.load(path) is None
+
+    local_index.save(path)
+    loaded = LocalIndex.load(path)
+
+    assert loaded.distance_metric == 'euclidean'
+    assert not loaded.vectors.flags.owndata and not loaded.vectors.flags.writeable
+    assert loaded.query([0.0, 0.5], 3) == local_index.query([0.0, 0.5], 3)
+
+    LocalIndex.remove(path)
+
+    assert LocalIndex.load(path) is None
+
+
+def test_save_replaces_previous_snapshot(tmp_path):
+    """Test that saving again pairs the new keys with the new vectors and drops the old matrix."""
+    path = str(tmp_path / 'my-bucket__my-index')
+    LocalIndex.from_list_vectors(LIST_VECTORS, 2, 'euclidean').save(path)
+    first = LocalIndex.load(path)
+
+    LocalIndex.from_list_vectors(LIST_VECTORS[:1], 2, 'euclidean').save(path)
+    second = LocalIndex.load(path)
+
+    assert second.keys == ['x']
+    assert len(list(tmp_path.glob('*.npy'))) == 1
+    # An index loaded before the save keeps working on its own (unlinked) matrix
+    assert [result['key'] for result in first.query([0.0, 1.0], 3)] == ['y', 'x', 'xy']
+
+    LocalIndex.remove(path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    'corrupt',
+    [
+        lambda json_file, npy_file: json_file.write_text('{"keys": ['),
+        lambda json_file, npy_file: npy_file.write_bytes(npy_file.read_bytes()[:100]),
+        lambda json_file, npy_file: npy_file.unlink(),
+        lambda json_file, npy_file: json_file.write_text(
+            json_file.read_text().replace('"keys": ["x", ', '"keys": [')
+        ),
+    ],
+    ids=['truncated-json', 'truncated-npy', 'missing-npy', 'mismatched-keys'],
+)
+def test_load_ignores_corrupt_snapshots(tmp_path, corrupt):
+    """Test that an incomplete or corrupt snapshot loads as None instead of raising."""
+    path = str(tmp_path / 'my-bucket__my-index')
+    LocalIndex.from_list_vectors(LIST_VECTORS, 2, 'euclidean').save(path)
+    corrupt(tmp_path / 'my-bucket__my-index.json', next(tmp_path.glob('*.npy')))
+
+    assert LocalIndex.load(path) is None
+
+
+def test_query_top_k_matches_full_sort():
+    """Test that partial selection returns the same nearest vectors as sorting every distance."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000, 16)).astype(np.float32)
+    local_index = LocalIndex([str(row) for row in range(1000)], vectors, [{}] * 1000, 'euclidean')
+    query = rng.standard_normal(16).astype(np.float32)
+
+    results = local_index.query(query, top_k=10)
+
+    expected = np.argsort(np.linalg.norm(vectors - query, axis=1))[:10]
+    assert [result['key'] for result in results] == [str(row) for row in expected]
@@ -0,0 +1,292 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the request model validation of the S3 Vectors MCP server."""
+
+import pytest
+import re
+from awslabs.s3_vectors_mcp_server.consts import (
+    IMAGE_EMBEDDING_MODELS,
+    MAX_VECTOR_DIMENSION,
+    TEXT_EMBEDDING_MODELS,
+    VECTOR_INDEX_NAME_PATTERN,
+)
+from awslabs.s3_vectors_mcp_server.models import (
+    CreateVectorBucketRequest,
+    EmbedAndQueryBatchRequest,
+    EmbedAndQueryTextRequest,
+    EmbedAndStoreFileRequest,
+    EmbedAndStoreTextsBatchRequest,
+    GetIndexRequest,
+    InputVector,
+    InputVectorListAdapter,
+    ListIndexesRequest,
+    ListVectorsRequest,
+    VectorData,
+)
+from pydantic import ValidationError
+
+
+@pytest.mark.parametrize(
+    'index_name',
+    ['abc', 'my-index', 'my.index.1', '0ab', 'a' * 63],
+)
+def test_valid_index_names(index_name):
+    """Test that valid index names are accepted."""
+    request = GetIndexRequest(vectorBucketName='my-bucket', indexName=index_name)
+
+    assert request.indexName == index_name
+    assert re.match(VECTOR_INDEX_NAME_PATTERN, index_name)
+
+
+@pytest.mark.parametrize(
+    'index_name',
+    ['ab', 'a' * 64, '-abc', 'abc-', '.abc', 'abc.', 'My-Index', 'my_index', 'my index'],
+)
+def test_invalid_index_names(index_name):
+    """Test that invalid index names are rejected."""
+    with pytest.raises(ValidationError):
+        GetIndexRequest(vectorBucketName='my-bucket', indexName=index_name)
+
+
+@pytest.mark.parametrize(
+    'file, model_id',
+    [
+        ('./documents/sample.txt', TEXT_EMBEDDING_MODELS[0]),
+        ('./documents/README.MD', TEXT_EMBEDDING_MODELS[1]),
+        ('./images/photo.jpeg', IMAGE_EMBEDDING_MODELS[0]),
+        ('s3://my-bucket/images/*.webp', IMAGE_EMBEDDING_MODELS[0]),
+    ],
+)
+def test_file_type_matches_model(file, model_id):
+    """Test that files are accepted when the embedding model supports their type."""
+    request = EmbedAndStoreFileRequest(
+        vectorBucketName='my-bucket', indexName='my-index', file=file, modelId=model_id
+    )
+
+    assert request.file == file
+
+
+@pytest.mark.parametrize(
+    'file, model_id',
+    [
+        ('./documents/sample.txt', IMAGE_EMBEDDING_MODELS[0]),
+        ('./images/photo.png', TEXT_EMBEDDING_MODELS[0]),
+        ('./archive/data.zip', TEXT_EMBEDDING_MODELS[0]),
+        ('s3://my-bucket/text/*', TEXT_EMBEDDING_MODELS[0]),
+        ('./documents/..txt', TEXT_EMBEDDING_MODELS[0]),
+        ('.txt', TEXT_EMBEDDING_MODELS[0]),
+    ],
+)
+def test_file_type_does_not_match_model(file, model_id):
+    """Test that files are rejected for unsupported types or mismatched embedding models."""
+    with pytest.raises(ValidationError):
+        EmbedAndStoreFileRequest(
+            vectorBucketName='my-bucket', indexName='my-index', file=file, modelId=model_id
+        )
+
+
+def test_requests_reject_unknown_fields_and_are_frozen():
+    """Test that request models forbid extra fields and cannot be mutated."""
+    with pytest.raises(ValidationError):
+        GetIndexRequest(vectorBucketName='my-bucket', indexName='my-index', unknown='value')
+
+    request = GetIndexRequest(vectorBucketName='my-bucket', indexName='my-index')
+
+    with pytest.raises(ValidationError):
+        request.indexName = 'other-index'
+
+
+def test_create_vector_bucket_default_encryption():
+    """Test that vector buckets default to AES256 encryption without sharing the default."""
+    request = CreateVectorBucketRequest(vectorBucketName='my-bucket')
+    other = CreateVectorBucketRequest(vectorBucketName='my-bucket', encryptionConfiguration={})
+
+    assert request.encryptionConfiguration == {'sseType': 'AES256'}
+    assert other.encryptionConfiguration == {'sseType': 'AES256'}
+    assert request.encryptionConfiguration is not other.encryptionConfiguration
+    assert isinstance(request.encryptionConfiguration, dict)
+
+
+def test_create_vector_bucket_kms_encryption():
+    """Test that KMS encryption requires a valid KMS key ARN."""
+    kms_key_arn = (
+        'arn:aws:kms:us-east-1:123456789012:key/' + '1234abcd-12ab-34cd-56ef-1234567890ab'
+    )
+
+    request = CreateVectorBucketRequest(
+        vectorBucketName='my-bucket',
+        encryptionConfiguration={'sseType': 'aws:kms', 'kmsKeyArn': kms_key_arn},
+    )
+
+    assert request.encryptionConfiguration['kmsKeyArn'] == kms_key_arn
+
+    with pytest.raises(ValidationError):
+        CreateVectorBucketRequest(
+            vectorBucketName='my-bucket', encryptionConfiguration={'sseType': 'aws:kms'}
+        )
+
+    with pytest.raises(ValidationError):
+        CreateVectorBucketRequest(
+            vectorBucketName='my-bucket',
+            encryptionConfiguration={'sseType': 'aws:kms', 'kmsKeyArn': 'not-an-arn'},
+        )
+
+    with pytest.raises(ValidationError):
+        CreateVectorBucketRequest(
+            vectorBucketName='my-bucket', encryptionConfiguration={'sseType': 'DES'}
+        )
+
+
+def test_pagination_token_is_passed_through_as_string():
+    """Test that pagination tokens are dumped as the bare token string expected by boto3."""
+    request = ListIndexesRequest(vectorBucketName='my-bucket', nextToken={'nextToken': 'abc123'})
+
+    assert request.model_dump(exclude_none=True) == {
+        'vectorBucketName': 'my-bucket',
+        'nextToken': 'abc123',
+    }
+    assert 'nextToken' not in ListIndexesRequest(vectorBucketName='my-bucket').model_dump(
+        exclude_none=True
+    )
+
+
+def test_input_vector_list_adapter():
+    """Test that a batch of input vectors is validated in a single call."""
+    vectors = InputVectorListAdapter.validate_python(
+        [
+            {'key': 'v1', 'data': {'float32': [0.1, 0.2]}},
+            {'key': 'v2', 'data': {'float32': [0.3, 0.4]}, 'metadata': {'genre': 'scifi'}},
+        ]
+    )
+
+    assert [type(v) for v in vectors] == [InputVector, InputVector]
+    assert vectors[1].metadata == {'genre': 'scifi'}
+
+    with pytest.raises(ValidationError):
+        InputVectorListAdapter.validate_python([{'key': 'v1', 'data': {'float32': ['x']}}])
+
+
+def test_input_vector_metadata_is_not_copied():
+    """Test that input vector metadata is passed through without being re-validated."""
+    metadata = {'genre': 'scifi', 'tags': ['space', 'robots'], 'nested': {'year': 2020}}
+
+    vector = InputVector(key='v1', data={'float32': [0.1, 0.2]}, metadata=metadata)
+
+    assert vector.metadata is metadata
+
+
+def test_vector_data_dimension_bounds():
+    """Test that vector data must have between 1 and MAX_VECTOR_DIMENSION elements."""
+    assert len(VectorData(float32=[0.5] * MAX_VECTOR_DIMENSION).float32) == MAX_VECTOR_DIMENSION
+
+    with pytest.raises(ValidationError):
+        VectorData(float32=[])
+
+    with pytest.raises(ValidationError):
+        VectorData(float32=[0.5] * (MAX_VECTOR_DIMENSION + 1))
+
+
+def test_list_vectors_request_defaults():
+    """Test that list_vectors only requires the bucket and index, and fetches one page."""
+    request = ListVectorsRequest(vectorBucketName='my-bucket', indexName='my-index')
+
+    assert request.maxPages == 1
+    assert request.model_dump(exclude_none=True, exclude={'maxPages'}) == {
+        'vectorBucketName': 'my-bucket',
+        'indexName': 'my-index',
+    }
+
+    with pytest.raises(ValidationError):
+        ListVectorsRequest(vectorBucketName='my-bucket', indexName='my-index', maxPages=0)
+
+
+def test_embed_and_store_texts_batch_metadata_per_text():
+    """Test that batch metadata, when given, must have one entry per text."""
+    request = EmbedAndStoreTextsBatchRequest(
+        vectorBucketName='my-bucket',
+        indexName='my-index',
+        textValues=['a', 'b'],
+        metadata=[{'genre': 'scifi'}, {}],
+    )
+
+    assert request.metadata == [{'genre': 'scifi'}, {}]
+
+    with pytest.raises(ValidationError):
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket',
+            indexName='my-index',
+            textValues=['a', 'b'],
+            metadata=[{'genre': 'scifi'}],
+        )
+
+    with pytest.raises(ValidationError):
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket', indexName='my-index', textValues=[]
+        )
+
+
+def test_embed_and_query_batch_request_validates_each_query():
+    """Test that batch queries are validated like single queries and cannot be empty."""
+    request = EmbedAndQueryBatchRequest(
+        queries=[{'vectorBucketName': 'my-bucket', 'indexName': 'my-index', 'queryInput': 'hi'}]
+    )
+
+    assert request.queries[0].topK == '5'
+
+    with pytest.raises(ValidationError):
+        EmbedAndQueryBatchRequest(queries=[])
+
+    with pytest.raises(ValidationError):
+        EmbedAndQueryBatchRequest(
+            queries=[{'vectorBucketName': 'my-bucket', 'indexName': 'ab', 'queryInput': 'hi'}]
+        )
+
+
+def test_embed_and_store_texts_batch_metadata_columns():
+    """Test that columnar batch metadata needs one value per text and excludes metadata."""
+    request = EmbedAndStoreTextsBatchRequest(
+        vectorBucketName='my-bucket',
+        indexName='my-index',
+        textValues=['a', 'b'],
+        metadataColumns={'genre': ['scifi', 'drama'], 'year': [2020, 2021]},
+    )
+
+    assert request.metadataColumns['year'] == [2020, 2021]
+
+    with pytest.raises(ValidationError):
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket',
+            indexName='my-index',
+            textValues=['a', 'b'],
+            metadataColumns={'genre': ['scifi']},
+        )
+
+    with pytest.raises(ValidationError):
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket',
+            indexName='my-index',
+            textValues=['a'],
+            metadata=[{'genre': 'scifi'}],
+            metadataColumns={'genre': ['scifi']},
+        )
+
+
+@pytest.mark.parametrize('top_k', ['', '0', '-1', 'five', '2.5', ' 3'])
+def test_embed_and_query_rejects_non_numeric_top_k(top_k):
+    """Test that topK must be a positive integer, so that the query can convert it."""
+    with pytest.raises(ValidationError):
+        EmbedAndQueryTextRequest(
+            vectorBucketName='my-bucket', indexName='my-index', queryInput='hi', topK=top_k
+        )
@@ -1,4 +1,5 @@
 import datasets
+import itertools
 import os
 import pytest
 from awslabs.s3_vectors_mcp_server.consts import IMAGE_EMBEDDING_MODELS
@@ -6,13 +7,13 @@ from awslabs.s3_vectors_mcp_server.models import (
     CreateIndexRequest,
     EmbedAndQueryTextRequest,
     EmbedAndStoreFileRequest,
-    EmbedAndStoreTextRequest,
+    EmbedAndStoreTextsBatchRequest,
 )
 from awslabs.s3_vectors_mcp_server.server import (
     create_index,
     embed_and_query,
     embed_and_store_file,
-    embed_and_store_text,
+    embed_and_store_texts_batch,
 )
 from tests.helpers import process_stdout_results
 
@@ -35,28 +36,28 @@ async def test_create_text_index_for_retrieval():
 
 @pytest.mark.asyncio
 async def test_create_text_vectors_for_retrieval():
-    """Test embed_and_store_text tool with raw text input."""
+    """Test embed_and_store_texts_batch tool with raw text input."""
     bucket_name = 'test-s3-vector-for-mcp-server'
     index_name = 'text-vector-index'
-    # text_value = 'hello world'
     content_type = 'text'
     dimension = 1024
 
-    data = datasets.load_dataset('roneneldan/TinyStories')
+    # Streams only the rows used instead of downloading the whole dataset
+    data = datasets.load_dataset('roneneldan/TinyStories', split='train', streaming=True)
+    text_values = [row['text'] for row in itertools.islice(data, 10)]
 
-    for context_data in data.data['train'][0][:10]:
-        text_value = context_data.as_py()
+    embed_and_store_texts_batch_request = EmbedAndStoreTextsBatchRequest(
+        vectorBucketName=bucket_name, indexName=index_name, textValues=text_values
+    )
 
-        embed_and_store_text_request = EmbedAndStoreTextRequest(
-            vectorBucketName=bucket_name, indexName=index_name, textValue=text_value
-        )
+    results = await embed_and_store_texts_batch(embed_and_store_texts_batch_request)
 
-        results = await embed_and_store_text(embed_and_store_text_request)
-
-        assert results['bucket'] == bucket_name
-        assert results['index'] == index_name
-        assert results['contentType'] == content_type
-        assert results['embeddingDimensions'] == dimension
+    assert len(results) == len(text_values)
+    for result in results:
+        assert result['bucket'] == bucket_name
+        assert result['index'] == index_name
+        assert result['contentType'] == content_type
+        assert result['embeddingDimensions'] == dimension
 
 
 @pytest.mark.asyncio
@@ -135,16 +136,17 @@ async def test_create_image_vectors_for_retrieval():
 
     DIR = './data/image_query'
 
+    common = {
+        'vectorBucketName': bucket_name,
+        'indexName': index_name,
+        'modality': content_type,
+        'modelId': IMAGE_EMBEDDING_MODELS[0],
+    }
+
     for file in os.listdir(DIR):
         file_path = f'{DIR}/{file}'
 
-        embed_and_store_file_request = EmbedAndStoreFileRequest(
-            vectorBucketName=bucket_name,
-            indexName=index_name,
-            modality=content_type,
-            modelId=IMAGE_EMBEDDING_MODELS[0],
-            file=file_path,
-        )
+        embed_and_store_file_request = EmbedAndStoreFileRequest(**common, file=file_path)
 
         results = await embed_and_store_file(embed_and_store_file_request)
 
@@ -0,0 +1,87 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the semantic query cache of the S3 Vectors MCP server."""
+
+import time
+from awslabs.s3_vectors_mcp_server.semantic_cache import SemanticCache
+
+
+def test_semantic_cache_matches_similar_embeddings_in_scope():
+    """Test that results are reused only for similar embeddings within the same scope."""
+    cache = SemanticCache(threshold=0.97, ttl=60, max_entries=10, max_scopes=4)
+    cache.set('scope', [1.0, 0.0, 0.0], 'x-axis')
+    cache.set('scope', [0.0, 1.0, 0.0], 'y-axis')
+
+    assert cache.get('scope', [2.0, 0.1, 0.0]) == 'x-axis'
+    assert cache.get('scope', [0.1, 3.0, 0.0]) == 'y-axis'
+    assert cache.get('scope', [1.0, 1.0, 0.0]) is None
+    assert cache.get('other-scope', [1.0, 0.0, 0.0]) is None
+
+
+def test_semantic_cache_expiry_and_eviction(monkeypatch):
+    """Test that entries expire after the TTL and the oldest entry is replaced when full."""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = SemanticCache(threshold=0.97, ttl=60, max_entries=2, max_scopes=4)
+    cache.set('scope', [1.0, 0.0], 'first')
+    cache.set('scope', [0.0, 1.0], 'second')
+    cache.set('scope', [-1.0, 0.0], 'third')
+
+    assert cache.get('scope', [1.0, 0.0]) is None
+    assert cache.get('scope', [-1.0, 0.0]) == 'third'
+
+    now[0] += 61
+    assert cache.get('scope', [-1.0, 0.0]) is None
+
+
+def test_semantic_cache_disabled():
+    """Test that a threshold of 0 disables the cache."""
+    cache = SemanticCache(threshold=0, ttl=60, max_entries=10, max_scopes=4)
+    cache.set('scope', [1.0, 0.0], 'value')
+
+    assert not cache.enabled
+    assert cache.get('scope', [1.0, 0.0]) is None
+
+
+def test_semantic_cache_grows_and_wraps():
+    """Test that a scope grows past its initial capacity and then replaces its oldest entries."""
+    cache = SemanticCache(threshold=0.999, ttl=60, max_entries=40, max_scopes=4)
+    basis = [[float(i == j) for j in range(50)] for i in range(50)]
+    for i, embedding in enumerate(basis):
+        cache.set('scope', embedding, i)
+
+    assert [cache.get('scope', embedding) for embedding in basis[:10]] == [None] * 10
+    assert [cache.get('scope', embedding) for embedding in basis[10:]] == list(range(10, 50))
+
+
+def test_semantic_cache_bounds_scopes(monkeypatch):
+    """Test that expired scopes are dropped and the least recently used scope is evicted."""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = SemanticCache(threshold=0.97, ttl=60, max_entries=10, max_scopes=2)
+    cache.set('a', [1.0, 0.0], 'a')
+    cache.set('b', [1.0, 0.0], 'b')
+
+    # Using a makes b the least recently used scope, so c replaces it
+    assert cache.get('a', [1.0, 0.0]) == 'a'
+    cache.set('c', [1.0, 0.0], 'c')
+
+    assert list(cache._scopes) == ['a', 'c']
+    assert cache.get('b', [1.0, 0.0]) is None
+
+    now[0] += 61
+    cache.set('d', [1.0, 0.0], 'd')
+
+    assert list(cache._scopes) == ['d']
@@ -0,0 +1,268 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the tools of the S3 Vectors MCP server."""
+
+import asyncio
+import io
+import json
+import numpy as np
+import pytest
+import sys
+import time
+from awslabs.s3_vectors_mcp_server import server
+from awslabs.s3_vectors_mcp_server.models import (
+    EmbedAndQueryTextRequest,
+    EmbedAndStoreTextsBatchRequest,
+    ListVectorsRequest,
+    WarmLocalIndexRequest,
+)
+from botocore.exceptions import ClientError
+
+
+EXPECTED_TOOLS = {
+    'create_vector_bucket',
+    'list_vector_buckets',
+    'get_vector_bucket',
+    'create_index',
+    'get_index',
+    'list_indexes',
+    'list_vectors',
+    'embed_and_store_text',
+    'embed_and_store_texts_batch',
+    'embed_and_store_file',
+    'embed_and_store_s3_objects',
+    'embed_and_query',
+    'embed_and_query_batch',
+    'warm_local_index',
+}
+
+
+async def test_all_tools_defined():
+    """Test that every tool is defined in the server module and registered with the server."""
+    tools = await server.mcp.list_tools()
+
+    assert {tool.name for tool in tools} == EXPECTED_TOOLS
+    assert all(callable(getattr(server, name, None)) for name in EXPECTED_TOOLS)
+
+
+def test_main_configures_logging(monkeypatch):
+    """Test that starting the server replaces the log sinks with stderr at FASTMCP_LOG_LEVEL."""
+    sinks = []
+    monkeypatch.setattr(server.logger, 'remove', lambda: sinks.clear())
+    monkeypatch.setattr(server.logger, 'add', lambda sink, level: sinks.append((sink, level)))
+    monkeypatch.setattr(server.mcp, 'run', lambda transport: None)
+    monkeypatch.setenv('FASTMCP_LOG_LEVEL', 'ERROR')
+
+    server.main()
+
+    assert sinks == [(sys.stderr, 'ERROR')]
+
+
+class _PagedS3Vectors:
+    """Answers list_vectors with three pages of one vector, each after a delay."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.tokens = []
+
+    def list_vectors(self, nextToken=None, **kwargs):
+        self.tokens.append(nextToken)
+        time.sleep(self.delay)
+        page = int(nextToken or 0)
+        response = {'vectors': [{'key': f'v{page}'}]}
+        if kwargs.get('returnData'):
+            response['vectors'][0]['data'] = {'float32': [1.0, float(page)]}
+        if page < 2:
+            response['nextToken'] = str(page + 1)
+        return response
+
+
+async def test_list_vectors_combines_pages(monkeypatch):
+    """Test that list_vectors follows nextToken for up to maxPages pages."""
+    s3v = _PagedS3Vectors(delay=0)
+    monkeypatch.setattr(server, 's3v', s3v)
+
+    response = await server.list_vectors(
+        ListVectorsRequest(vectorBucketName='my-bucket', indexName='my-index', maxPages=2)
+    )
+
+    assert response == {'vectors': [{'key': 'v0'}, {'key': 'v1'}], 'nextToken': '2'}
+    assert s3v.tokens == [None, '1']
+
+
+async def test_iter_pages_prefetches_next_page(monkeypatch):
+    """Test that the next page is fetched while the caller processes the current one."""
+    monkeypatch.setattr(server, 's3v', _PagedS3Vectors(delay=0.2))
+
+    start = time.perf_counter()
+    keys = []
+    async for page in server._iter_pages('list_vectors', {}, max_pages=5):
+        await asyncio.sleep(0.2)
+        keys.extend(vector['key'] for vector in page['vectors'])
+    elapsed = time.perf_counter() - start
+
+    assert keys == ['v0', 'v1', 'v2']
+    assert elapsed < 1.0
+
+
+async def test_warm_local_index_answers_queries_locally(monkeypatch, tmp_path):
+    """Test that a warmed index answers queries without a filter instead of S3 Vectors."""
+    s3v = _PagedS3Vectors(delay=0)
+    s3v.get_index = lambda **kwargs: {'index': {'dimension': 2, 'distanceMetric': 'cosine'}}
+    monkeypatch.setattr(server, 's3v', s3v)
+    monkeypatch.setattr(server, 'local_indexes', {})
+    monkeypatch.setattr(server, 'LOCAL_INDEX_DIR', str(tmp_path))
+    server.metadata_cache.clear()
+
+    response = await server.warm_local_index(
+        WarmLocalIndexRequest(vectorBucketName='my-bucket', indexName='my-index')
+    )
+
+    assert response['vectorCount'] == 3
+    assert s3v.tokens == [None, '1', '2']
+
+    # A restarted server loads the persisted copy on first use
+    monkeypatch.setattr(server, 'local_indexes', {})
+    request = EmbedAndQueryTextRequest(
+        vectorBucketName='my-bucket', indexName='my-index', queryInput='hi', topK='1'
+    )
+    result = server._query_vectors(request, np.array([0.0, 1.0], dtype=np.float32))
+
+    assert result['results'] == [{'Key': 'v2', 'metadata': {}}]
+
+    server._index_written('my-bucket', 'my-index')
+
+    assert server._get_local_index('my-bucket', 'my-index') is None
+
+
+class _BedrockRuntime:
+    """Answers InvokeModel with the same embedding for every text."""
+
+    def __init__(self, embedding=(0.6, 0.8)):
+        self.embedding = list(embedding)
+
+    def invoke_model(self, modelId, body, **kwargs):
+        texts = json.loads(body)['texts']
+        response = {'embeddings': [self.embedding] * len(texts)}
+        return {'body': io.BytesIO(json.dumps(response).encode())}
+
+
+class _StoringS3Vectors:
+    """Stores vectors, rejecting every PutVectors request with a vector marked as bad."""
+
+    def __init__(self, distance_metric='cosine'):
+        self.distance_metric = distance_metric
+        self.put_requests = []
+        self.data = []
+
+    def get_index(self, **kwargs):
+        return {'index': {'dimension': 2, 'distanceMetric': self.distance_metric}}
+
+    def put_vectors(self, vectors, **kwargs):
+        self.put_requests.append([vector['metadata'].get('n') for vector in vectors])
+        self.data.extend(vector['data']['float32'] for vector in vectors)
+        if any(vector['metadata'].get('bad') for vector in vectors):
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Invalid vector'}},
+                'PutVectors',
+            )
+
+    def query_vectors(self, **kwargs):
+        return {'vectors': [{'key': str(n)} for n in range(len(self.data))]}
+
+
+async def test_embed_and_store_texts_batch_isolates_failing_vectors(monkeypatch):
+    """Test that a vector PutVectors rejects does not fail the vectors stored with it."""
+    s3v = _StoringS3Vectors()
+    monkeypatch.setattr(server, 's3v', s3v)
+    monkeypatch.setattr(server, 'bedrock', _BedrockRuntime())
+    monkeypatch.setattr(server, 'embedding_cache', None)
+    server.metadata_cache.clear()
+
+    results = await server.embed_and_store_texts_batch(
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket',
+            indexName='my-index',
+            modelId='cohere.embed-english-v3',
+            textValues=['a', 'b', 'c'],
+            metadata=[{'n': 0}, {'n': 1, 'bad': True}, {'n': 2}],
+        )
+    )
+
+    assert 'Invalid vector' in results[1]['error']
+    assert [results[0]['metadata']['n'], results[2]['metadata']['n']] == [0, 2]
+    # The batch of three fails, then each vector is put on its own
+    assert s3v.put_requests[0] == [0, 1, 2]
+    assert sorted(s3v.put_requests[1:]) == [[0], [1], [2]]
+
+
+@pytest.mark.parametrize(
+    'distance_metric, stored', [('cosine', [0.6, 0.8]), ('euclidean', [3.0, 4.0])]
+)
+async def test_embeddings_are_normalized_only_for_cosine_indexes(
+    monkeypatch, distance_metric, stored
+):
+    """Test that euclidean indexes get raw embeddings, like the ones s3vectors-embed stores."""
+    s3v = _StoringS3Vectors(distance_metric)
+    monkeypatch.setattr(server, 's3v', s3v)
+    monkeypatch.setattr(server, 'bedrock', _BedrockRuntime([3.0, 4.0]))
+    monkeypatch.setattr(server, 'embedding_cache', None)
+    server.metadata_cache.clear()
+
+    await server.embed_and_store_texts_batch(
+        EmbedAndStoreTextsBatchRequest(
+            vectorBucketName='my-bucket',
+            indexName='my-index',
+            modelId='cohere.embed-english-v3',
+            textValues=['a'],
+        )
+    )
+
+    assert s3v.data == [pytest.approx(stored)]
+
+
+async def test_writes_invalidate_cached_query_results(monkeypatch):
+    """Test that a query after a write through this server is not answered from the cache."""
+    s3v = _StoringS3Vectors()
+    monkeypatch.setattr(server, 's3v', s3v)
+    monkeypatch.setattr(server, 'bedrock', _BedrockRuntime())
+    monkeypatch.setattr(server, 'embedding_cache', None)
+    monkeypatch.setattr(server, 'local_indexes', {})
+    monkeypatch.setattr(server, 'LOCAL_INDEX_DIR', None)
+    server.metadata_cache.clear()
+    server.query_cache.clear()
+    store = EmbedAndStoreTextsBatchRequest(
+        vectorBucketName='my-bucket',
+        indexName='my-index',
+        modelId='cohere.embed-english-v3',
+        textValues=['a'],
+    )
+    query = EmbedAndQueryTextRequest(
+        vectorBucketName='my-bucket',
+        indexName='my-index',
+        modelId='cohere.embed-english-v3',
+        queryInput='a',
+    )
+
+    await server.embed_and_store_texts_batch(store)
+    first = await server.embed_and_query(query)
+
+    assert await server.embed_and_query(query) is first
+
+    await server.embed_and_store_texts_batch(store)
+    second = await server.embed_and_query(query)
+
+    assert first['summary']['resultsFound'] == 1
+    assert second['summary']['resultsFound'] == 2